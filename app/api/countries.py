@@ -1,87 +1,479 @@
 # app/api/countries.py
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from app.crud.countries import (
-    get_countries,
-    get_country_by_cca2,
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import List, Literal, Optional
+from app.crud.countries_async import (
+    AnySession,
     create_country,
     update_country,
     delete_country,
-    get_countries_by_region,
-    get_countries_by_language,
-    search_countries
+    bulk_create_countries,
+    bulk_update_countries,
+    bulk_delete_countries,
+    get_snapshot,
+    get_search_index,
+    get_stats,
+    get_columns,
+    get_changes,
 )
-from app.db.database import get_db
-from app.schemas.country import Country, CountryCreate, CountryUpdate
+from app.db.database import get_async_db
+from app.schemas.country import (
+    Country,
+    CountryCreate,
+    CountryUpdate,
+    CountrySummary,
+    CountryBulkUpdate,
+    BulkItemResult,
+    CountryStats,
+    QueryGroup,
+    CountryChangeFeed,
+)
+from app.core.config import settings
+from app.core.compression import negotiate
+from app.core.http_cache import CachePolicy, current_etag, etag_matches
+from app.services.country_snapshot import (
+    RECORD_FIELDS,
+    SORTABLE_FIELDS,
+    decode_cursor,
+    encode_cursor,
+)
+from app.services import country_columns, country_events, country_neighbors, country_timezones
+from app.services.change_feed import change_payload, stream_changes
+from app.services.country_export import FORMATS, export_cache, parse_range
+from app.services.country_columns import ORDERABLE_COLUMNS
+from app.services.country_timezones import MAX_OFFSET, MIN_OFFSET, format_utc_offset, parse_utc_offset
 # from app.core.security import get_current_user
 
 router = APIRouter()
 
+# Cache-Control overrides for GET routes, keyed by path relative to the router;
+# other routes use the API_CACHE_* defaults from Settings
+CACHE_POLICIES = {
+    "/search/": CachePolicy(max_age=30, stale_while_revalidate=60),
+    "/search/suggest": CachePolicy(max_age=30, stale_while_revalidate=60),
+    # Reads the change log, which other processes (ingest) append to too
+    "/changes": CachePolicy(versioned=False),
+}
+
+def countries_response(snapshot, countries, headers=None):
+    """
+    With FAST_JSON_RESPONSES, answer with the snapshot's cached, pre-serialized
+    rows joined into one body instead of validating every row through the
+    response model (the declared response_model still documents the shape).
+    """
+    if settings.FAST_JSON_RESPONSES:
+        return Response(snapshot.json_array(countries), media_type="application/json", headers=headers)
+    return countries
+
+def country_response(snapshot, country):
+    if settings.FAST_JSON_RESPONSES:
+        return Response(snapshot.json_row(country), media_type="application/json")
+    return country
+
 # 1. List all countries
 @router.get("/", response_model=List[Country])
-def list_countries(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def list_countries(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's X-Next-Cursor header"),
+    sort: str = Query("id", description="Sort column, prefix with '-' for descending"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. name_common,cca2,flag_url"),
+    region: Optional[str] = None,
+    population_min: Optional[int] = None,
+    population_max: Optional[int] = None,
+    un_member: Optional[bool] = None,
+    db: AnySession = Depends(get_async_db),
+):
     """
-    Retrieve a list of all countries with pagination support.
+    Retrieve a list of countries with keyset (cursor) pagination, sorting,
+    filtering and optional field projection. When more results exist the
+    cursor for the next page is returned in the X-Next-Cursor header.
     """
-    return get_countries(db, skip=skip, limit=limit)
+    column = sort.lstrip("-")
+    if column not in SORTABLE_FIELDS:
+        raise HTTPException(status_code=400, detail=f"Cannot sort by '{column}'")
+    only = None
+    if fields:
+        only = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = set(only) - set(RECORD_FIELDS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    try:
+        after = decode_cursor(cursor, column) if cursor else None
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    def matches(country):
+        if region is not None and country.region != region:
+            return False
+        if un_member is not None and bool(country.un_member) != un_member:
+            return False
+        if population_min is not None and (country.population is None or country.population < population_min):
+            return False
+        if population_max is not None and (country.population is None or country.population > population_max):
+            return False
+        return True
+
+    filtered = region is not None or un_member is not None or population_min is not None or population_max is not None
+    snapshot = await get_snapshot(db)
+    countries, next_key = snapshot.keyset_page(
+        column=column,
+        descending=sort.startswith("-"),
+        after=after,
+        limit=limit,
+        skip=skip,
+        predicate=matches if filtered else None,
+    )
+
+    headers = {"X-Next-Cursor": encode_cursor(column, next_key)} if next_key else {}
+    if only is not None:
+        return JSONResponse([country.as_dict(only) for country in countries], headers=headers)
+    response.headers.update(headers)
+    return countries_response(snapshot, countries, headers)
+
+def parse_codes(codes: str) -> List[str]:
+    return list(dict.fromkeys(code.strip() for code in codes.split(",") if code.strip()))
+
+def check_bulk_size(items: list) -> list:
+    if len(items) > settings.BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {settings.BULK_MAX_ITEMS} items per bulk request")
+    return items
+
+# Batch / bulk routes are declared before "/{cca2}" so their literal paths win
+
+# 10. Retrieve several countries in one request
+@router.get("/batch", response_model=List[Country])
+async def get_countries_batch(
+    codes: str = Query(..., description="Comma-separated cca2 codes, e.g. US,FR,DE"),
+    db: AnySession = Depends(get_async_db),
+):
+    """
+    Get several countries by cca2 code. Unknown codes are omitted.
+    """
+    snapshot = await get_snapshot(db)
+    countries = [country for country in map(snapshot.get, parse_codes(codes)) if country is not None]
+    return countries_response(snapshot, countries)
+
+# 11. Create several countries in one transaction
+@router.post("/bulk", response_model=List[BulkItemResult])
+async def bulk_add_countries(countries: List[CountryCreate], db: AnySession = Depends(get_async_db)):
+    """
+    Create many countries at once; the outcome of each item is reported separately.
+    """
+    return await bulk_create_countries(db, check_bulk_size(countries))
+
+# 12. Update several countries in one transaction
+@router.patch("/bulk", response_model=List[BulkItemResult])
+async def bulk_update_country_details(countries: List[CountryBulkUpdate], db: AnySession = Depends(get_async_db)):
+    """
+    Partially update many countries at once, each identified by its cca2.
+    """
+    return await bulk_update_countries(db, check_bulk_size(countries))
+
+# 13. Delete several countries in one transaction
+@router.delete("/bulk", response_model=List[BulkItemResult])
+async def bulk_remove_countries(
+    codes: str = Query(..., description="Comma-separated cca2 codes"),
+    db: AnySession = Depends(get_async_db),
+):
+    """
+    Delete many countries at once.
+    """
+    return await bulk_delete_countries(db, check_bulk_size(parse_codes(codes)))
+
+# 14. Aggregate statistics
+@router.get("/stats", response_model=CountryStats)
+async def country_stats(db: AnySession = Depends(get_async_db)):
+    """
+    Totals, population / area sums, density and population percentiles,
+    overall and per region, subregion and language code.
+    """
+    return await get_stats(db)
+
+def query_mask(columns, region, subregion, language, timezone, un_member, independent,
+               population_min, population_max, area_min, area_max, density_min, density_max):
+    return columns.select(
+        region=region,
+        subregion=subregion,
+        language=language,
+        timezone=timezone,
+        un_member=un_member,
+        independent=independent,
+        ranges={
+            "population": (population_min, population_max),
+            "area": (area_min, area_max),
+            "density": (density_min, density_max),
+        },
+    )
+
+# 15. Analytical filters served from the columnar store
+@router.get("/query", response_model=List[Country])
+async def query_countries(
+    response: Response,
+    region: Optional[str] = None,
+    subregion: Optional[str] = None,
+    language: Optional[str] = Query(None, description="Language code (e.g. fra) or name (e.g. French)"),
+    timezone: Optional[str] = Query(None, description="Exact timezone, e.g. UTC+01:00"),
+    un_member: Optional[bool] = None,
+    independent: Optional[bool] = None,
+    population_min: Optional[int] = None,
+    population_max: Optional[int] = None,
+    area_min: Optional[float] = None,
+    area_max: Optional[float] = None,
+    density_min: Optional[float] = Query(None, description="People per km²"),
+    density_max: Optional[float] = None,
+    order_by: str = Query("id", description="id, population, area or density; prefix with '-' for descending"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1),
+    db: AnySession = Depends(get_async_db),
+):
+    """
+    Filter countries by value and numeric ranges (bounds are inclusive,
+    missing values never match a range) and order them. The number of
+    matches before paging is returned in the X-Total-Count header.
+    """
+    column = order_by.lstrip("-")
+    if column not in ORDERABLE_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"Cannot order by '{column}'")
+    snapshot = await get_snapshot(db)
+    columns = country_columns.columns_for(snapshot)
+    mask = query_mask(columns, region, subregion, language, timezone, un_member, independent,
+                      population_min, population_max, area_min, area_max, density_min, density_max)
+    rows = columns.rows(mask, order_by=column, descending=order_by.startswith("-"), offset=offset, limit=limit)
+    headers = {"X-Total-Count": str(mask.bit_count())}
+    response.headers.update(headers)
+    return countries_response(snapshot, columns.records_for(rows), headers)
+
+# 16. Aggregates of a filtered set, grouped by region or subregion
+@router.get("/query/groups", response_model=List[QueryGroup])
+async def query_country_groups(
+    by: Literal["region", "subregion"] = "region",
+    region: Optional[str] = None,
+    subregion: Optional[str] = None,
+    language: Optional[str] = None,
+    timezone: Optional[str] = None,
+    un_member: Optional[bool] = None,
+    independent: Optional[bool] = None,
+    population_min: Optional[int] = None,
+    population_max: Optional[int] = None,
+    area_min: Optional[float] = None,
+    area_max: Optional[float] = None,
+    density_min: Optional[float] = None,
+    density_max: Optional[float] = None,
+    db: AnySession = Depends(get_async_db),
+):
+    """
+    Country count, population and area per region (or subregion) of the
+    countries matching the same filters as /query, largest groups first.
+    """
+    columns = await get_columns(db)
+    mask = query_mask(columns, region, subregion, language, timezone, un_member, independent,
+                      population_min, population_max, area_min, area_max, density_min, density_max)
+    return columns.group_by(mask, by)
+
+def parse_offset(value: str) -> int:
+    offset = parse_utc_offset(value)
+    if offset is None:
+        raise HTTPException(status_code=400, detail=f"'{value}' is not a UTC offset (e.g. UTC+05:30, +3, -0330)")
+    return offset
+
+# 17. Countries with a timezone in a UTC offset range
+@router.get("/timezone", response_model=List[Country])
+async def get_countries_by_timezone_range(
+    start: str = Query(format_utc_offset(MIN_OFFSET), description="Lowest offset, e.g. UTC+03:00 or +3"),
+    end: str = Query(format_utc_offset(MAX_OFFSET), description="Highest offset, inclusive, e.g. UTC+06:00"),
+    db: AnySession = Depends(get_async_db),
+):
+    """
+    Get countries having at least one timezone between two UTC offsets,
+    ordered by offset. Example: /countries_api/timezone?start=%2B3&end=%2B6
+    """
+    low, high = parse_offset(start), parse_offset(end)
+    if low > high:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    snapshot = await get_snapshot(db)
+    return countries_response(snapshot, country_timezones.timezone_index_for(snapshot).between(low, high))
+
+# 18. Countries in one UTC offset
+@router.get("/timezone/{offset}", response_model=List[Country])
+async def get_countries_by_timezone(offset: str, db: AnySession = Depends(get_async_db)):
+    """
+    Get countries having a timezone at the given UTC offset.
+    Examples:
+    - /countries_api/timezone/UTC+05:30
+    - /countries_api/timezone/-3
+    """
+    snapshot = await get_snapshot(db)
+    countries = country_timezones.timezone_index_for(snapshot).at(parse_offset(offset))
+    if not countries:
+        raise HTTPException(status_code=404, detail=f"No countries found for UTC offset '{offset}'")
+    return countries_response(snapshot, countries)
+
+# 19. Download the whole dataset in one request
+@router.get("/export", response_class=Response)
+async def export_countries(
+    request: Request,
+    format: Literal["jsonl", "csv", "parquet"] = "jsonl",
+):
+    """
+    Every country as JSON Lines, CSV or Parquet (Parquet needs pyarrow).
+    The first download of a dataset version streams from the database;
+    later ones are served from a cached, precompressed copy and honor Range
+    requests, so interrupted downloads can resume.
+    """
+    export_format = FORMATS.get(format)
+    if export_format is None:
+        raise HTTPException(status_code=501, detail=f"{format} export is not available on this server")
+    encoding = negotiate(request.headers.get("accept-encoding")) if export_format.compressible else None
+    # Read once, before any data: the ETag, the artifact and the stream all use it
+    version = country_events.current_version()
+    # Distinct per format and encoding, so only an exact match revalidates
+    etag = f'{current_etag(version)[:-1]}-{format}{"-" + encoding if encoding else ""}"'
+    headers = {
+        "ETag": etag,
+        "Content-Disposition": f'attachment; filename="countries.{export_format.extension}"',
+        "Vary": "Accept-Encoding",
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag, exact=True):
+        return Response(status_code=304, headers={"ETag": etag, "Vary": "Accept-Encoding"})
+    if encoding:
+        headers["Content-Encoding"] = encoding
+
+    artifact = export_cache.get(format, version)
+    if artifact is None:
+        return StreamingResponse(
+            export_cache.stream(export_format, encoding, settings.EXPORT_BATCH_SIZE, version),
+            media_type=export_format.media_type,
+            headers=headers,
+        )
+
+    # Compressing a large artifact the first time is CPU-bound; keep it off the loop
+    body = artifact.variant(encoding) if encoding is None else await run_in_threadpool(artifact.variant, encoding)
+    headers["Accept-Ranges"] = "bytes"
+    if_range = request.headers.get("if-range")
+    try:
+        span = parse_range(request.headers.get("range"), len(body)) if if_range in (None, etag) else None
+    except ValueError:
+        return Response(status_code=416, headers={"Content-Range": f"bytes */{len(body)}"})
+    if span is None:
+        return Response(body, media_type=export_format.media_type, headers=headers)
+    start, end = span
+    headers["Content-Range"] = f"bytes {start}-{end}/{len(body)}"
+    return Response(body[start:end + 1], status_code=206, media_type=export_format.media_type, headers=headers)
+
+# 20. Changes since a version, for incremental sync
+@router.get("/changes", response_model=CountryChangeFeed)
+async def list_changes(
+    request: Request,
+    response: Response,
+    since: Optional[int] = Query(None, ge=0),
+    limit: int = Query(1000, ge=1),
+    stream: bool = False,
+    db: AnySession = Depends(get_async_db),
+):
+    """
+    Creates, updates and deletes committed after version ``since`` (0 = from
+    the beginning), oldest first. Apply them in order and pass the returned
+    ``version`` as ``since`` next time; ``has_more`` means another page is
+    already waiting. Limit is capped at CHANGES_MAX_PAGE_SIZE.
+
+    With ``stream=true`` or ``Accept: text/event-stream`` the response is a
+    Server-Sent Events stream that stays open and sends each change as it is
+    committed. A reconnecting client resumes from its Last-Event-ID.
+
+    Examples:
+    - /countries_api/changes?since=120
+    - /countries_api/changes?since=120&stream=true
+    """
+    if since is None:
+        last_event_id = request.headers.get("last-event-id", "")
+        since = int(last_event_id) if last_event_id.isdigit() else 0
+    limit = min(limit, settings.CHANGES_MAX_PAGE_SIZE)
+    vary = "Accept, Last-Event-ID"
+    if stream or "text/event-stream" in request.headers.get("accept", ""):
+        return StreamingResponse(
+            stream_changes(since, limit, settings.CHANGES_STREAM_HEARTBEAT_SECONDS),
+            media_type="text/event-stream",
+            # Keep proxies from caching or buffering the stream
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "Vary": vary},
+        )
+    response.headers["Vary"] = vary
+    changes = await get_changes(db, since=since, limit=limit + 1)
+    payloads = [change_payload(change) for change in changes[:limit]]
+    return {
+        "version": payloads[-1]["version"] if payloads else since,
+        "has_more": len(changes) > limit,
+        "changes": payloads,
+    }
 
 # 2. Retrieve details of a specific country
 @router.get("/{cca2}", response_model=Country)
-def get_country_details(cca2: str, db: Session = Depends(get_db)):
+async def get_country_details(cca2: str, db: AnySession = Depends(get_async_db)):
     """
     Get detailed information about a specific country by its 2-letter code (cca2).
     """
-    country = get_country_by_cca2(db, cca2=cca2)
+    snapshot = await get_snapshot(db)
+    country = snapshot.get(cca2)
     if country is None:
         raise HTTPException(status_code=404, detail="Country not found")
-    return country
+    return country_response(snapshot, country)
 
 # 3. Create a new country entry
 @router.post("/", response_model=Country)
-def add_new_country(country: CountryCreate,db: Session = Depends(get_db)): # ,current_user: str = Depends(get_current_user)
+async def add_new_country(country: CountryCreate,db: AnySession = Depends(get_async_db)): # ,current_user: str = Depends(get_current_user)
     """
     Create a new country entry (requires authentication).
     """
-    return create_country(db, country=country)
+    return await create_country(db, country=country)
 
 # 4. Update an existing country's details
 @router.put("/{cca2}", response_model=Country)
-def update_country_details(cca2: str,country: CountryUpdate,db: Session = Depends(get_db)): # ,current_user: str = Depends(get_current_user)
+async def update_country_details(cca2: str,country: CountryUpdate,db: AnySession = Depends(get_async_db)): # ,current_user: str = Depends(get_current_user)
     """
     Update details of an existing country (requires authentication).
     """
-    db_country = update_country(db, cca2=cca2, country=country)
+    db_country = await update_country(db, cca2=cca2, country=country)
     if db_country is None:
         raise HTTPException(status_code=404, detail="Country not found")
     return db_country
 
 # 5. Delete an existing country
 @router.delete("/{cca2}", status_code=204)
-def remove_country(cca2: str,db: Session = Depends(get_db)): # ,current_user: str = Depends(get_current_user)
+async def remove_country(cca2: str,db: AnySession = Depends(get_async_db)): # ,current_user: str = Depends(get_current_user)
     """
     Delete a country (requires authentication).
     """
-    if not delete_country(db, cca2=cca2):
+    if not await delete_country(db, cca2=cca2):
         raise HTTPException(status_code=404, detail="Country not found")
     return {"detail": "Country deleted successfully"}
 
 # 6. List same regional countries of a specific country
 @router.get("/{cca2}/region", response_model=List[Country])
-def get_same_region_countries(cca2: str, db: Session = Depends(get_db)):
+async def get_same_region_countries(
+    cca2: str,
+    scope: Literal["region", "subregion"] = "region",
+    limit: Optional[int] = Query(None, ge=1),
+    db: AnySession = Depends(get_async_db),
+):
     """
-    Get all countries in the same region as the specified country.
+    Get all countries in the same region (or, with scope=subregion, the same
+    subregion) as the specified country.
     """
-    country = get_country_by_cca2(db, cca2=cca2)
-    if not country:
+    snapshot = await get_snapshot(db)
+    if snapshot.get(cca2) is None:
         raise HTTPException(status_code=404, detail="Country not found")
-    return get_countries_by_region(db, region=country.region)
+    # Group against the same snapshot, so every peer resolves to a record in it
+    peers = country_neighbors.neighbors_for(snapshot).peers(cca2, scope=scope, limit=limit)
+    records = [snapshot.get(peer.cca2) for peer in peers if peer.cca2]
+    return countries_response(snapshot, [record for record in records if record is not None])
 
 # 7. List countries that speak the same language
 @router.get("/language/{language}", response_model=List[Country])
-def get_countries_by_language_endpoint(
+async def get_countries_by_language_endpoint(
     language: str,
-    db: Session = Depends(get_db)
+    db: AnySession = Depends(get_async_db)
 ):
     """
     Get countries by language code or name.
@@ -89,24 +481,35 @@ def get_countries_by_language_endpoint(
     - /api/v1/countries/language/fra
     - /api/v1/countries/language/French
     """
-    countries = get_countries_by_language(db, language)
+    snapshot = await get_snapshot(db)
+    countries = snapshot.speaking(language)
     if not countries:
         raise HTTPException(
             status_code=404,
             detail=f"No countries found for language '{language}'"
         )
-    return countries
+    return countries_response(snapshot, countries)
 
 # 8. Search for a country by name (partial match)
 @router.get("/search/", response_model=List[Country])
-def search_countries_by_name(name: str, db: Session = Depends(get_db)):
+async def search_countries_by_name(name: str, limit: int = Query(50, ge=1, le=1000), db: AnySession = Depends(get_async_db)):
     """
-    Search for countries by name (supports partial matching).
+    Search for countries by name, official name, capital or code.
+    Results are ranked and tolerate small typos.
     """
-    countries = search_countries(db, name=name)
+    snapshot = await get_snapshot(db)
+    countries = (await get_search_index(db)).search(name, limit=limit)
     if not countries:
         raise HTTPException(
             status_code=404,
             detail=f"No countries found matching '{name}'"
         )
-    return countries
\ No newline at end of file
+    return countries_response(snapshot, countries)
+
+# 9. Autocomplete suggestions for a search box
+@router.get("/search/suggest", response_model=List[CountrySummary])
+async def suggest_countries(q: str, limit: int = Query(10, ge=1, le=100), db: AnySession = Depends(get_async_db)):
+    """
+    Return light-weight ranked suggestions, cheap enough to call on every keystroke.
+    """
+    return (await get_search_index(db)).search(q, limit=limit)
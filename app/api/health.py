@@ -0,0 +1,21 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.core.startup import startup
+
+router = APIRouter()
+
+
+@router.get("/healthz", include_in_schema=False)
+def healthz():
+    """Liveness: the process is up and serving requests."""
+    return {"status": "ok"}
+
+
+@router.get("/readyz", include_in_schema=False)
+def readyz():
+    """Readiness: 200 once startup warm-up has finished, 503 until then (or if it failed)."""
+    body = {"status": startup.status, "timings_ms": startup.timings}
+    if startup.error is not None:
+        body["error"] = startup.error
+    return JSONResponse(body, status_code=200 if startup.ready else 503)
@@ -0,0 +1,188 @@
+# app/core/compression.py
+"""
+Negotiated response compression (gzip, plus brotli / zstd when installed).
+
+Responses under ``cache_prefix`` are GETs whose body only changes with the
+dataset version, so their compressed form is cached per URL, encoding and
+ETag and served on later requests without reaching the router at all.
+"""
+import gzip
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.http_cache import current_etag
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional
+    zstandard = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/xml")
+
+ENCODERS = {"gzip": lambda data: gzip.compress(data, compresslevel=6, mtime=0)}
+if brotli is not None:
+    ENCODERS["br"] = lambda data: brotli.compress(data, quality=5)
+if zstandard is not None:
+    ENCODERS["zstd"] = lambda data: zstandard.ZstdCompressor(level=6).compress(data)
+
+# Larger bodies are streamed through uncompressed rather than buffered
+MAX_BUFFER_SIZE = 8 * 1024 * 1024
+
+# Tie-break between encodings the client weights equally
+PREFERENCE = ("br", "zstd", "gzip")
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick the best available encoding for an Accept-Encoding header."""
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+    wildcard = weights.get("*", 0.0)
+    best, best_q = None, 0.0
+    for encoding in PREFERENCE:
+        if encoding not in ENCODERS:
+            continue
+        q = weights.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 500,
+        cache_prefix: Optional[str] = None,
+        cache_size: int = 256,
+        uncached_paths: Iterable[str] = (),
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.cache_prefix = cache_prefix
+        # Paths under cache_prefix whose bodies don't follow the dataset version
+        self.uncached_paths = frozenset(uncached_paths)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cache_get(self, key):
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+            return entry
+
+    def _cache_put(self, key, entry):
+        with self._lock:
+            self._cache[key] = entry
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        cache_key = None
+        if (
+            self.cache_prefix
+            and scope["path"].startswith(self.cache_prefix)
+            and scope["path"] not in self.uncached_paths
+        ):
+            request_headers = Headers(scope=scope)
+            # Accept and Last-Event-ID can select a different body for the same URL
+            cache_key = (
+                scope["path"], scope["query_string"], encoding, current_etag(),
+                request_headers.get("accept"), request_headers.get("last-event-id"),
+            )
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                headers, body = cached
+                await send({"type": "http.response.start", "status": 200, "headers": headers})
+                await send({"type": "http.response.body", "body": body})
+                return
+
+        start: Optional[Message] = None
+        chunks = []
+        buffered = 0
+        passthrough = False
+
+        async def send_compressed(message: Message):
+            nonlocal start, buffered, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                if not self._compressible(start):
+                    passthrough = True
+                    await send(start)
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            buffered += len(chunks[-1])
+            if not message.get("more_body", False):
+                await self._finish(send, start, b"".join(chunks), encoding, cache_key)
+            elif buffered > MAX_BUFFER_SIZE:
+                # Too large to hold in memory; stream the rest uncompressed
+                passthrough = True
+                await send(start)
+                await send({"type": "http.response.body", "body": b"".join(chunks), "more_body": True})
+                chunks.clear()
+
+        await self.app(scope, receive, send_compressed)
+
+    def _compressible(self, start: Message) -> bool:
+        headers = Headers(raw=start["headers"])
+        content_type = headers.get("content-type", "")
+        return (
+            # 206 bodies are byte ranges of one specific representation
+            start["status"] not in (204, 206, 304)
+            and "content-encoding" not in headers
+            and content_type.startswith(COMPRESSIBLE_TYPES)
+            and not content_type.startswith("text/event-stream")
+        )
+
+    async def _finish(self, send: Send, start: Message, body: bytes, encoding: str, cache_key):
+        if len(body) < self.minimum_size:
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        headers = MutableHeaders(scope=start)
+        body = ENCODERS[encoding](body)
+        headers["content-encoding"] = encoding
+        headers["content-length"] = str(len(body))
+        headers.add_vary_header("Accept-Encoding")
+        if cache_key is not None:
+            # Each encoded representation needs its own strong ETag
+            etag = headers.get("etag", cache_key[3])
+            headers["etag"] = f'{etag[:-1]}-{encoding}"'
+            if 200 <= start["status"] < 300:
+                self._cache_put(cache_key, (list(start["headers"]), body))
+        await send(start)
+        await send({"type": "http.response.body", "body": body})
@@ -5,6 +5,91 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Serve requests through SQLAlchemy's asyncio extension (aiosqlite/asyncpg)
+    ASYNC_DATABASE: bool = False
+
+    # Connection pool (ignored for in-memory SQLite)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+
+    # Opt-in SQLite tuning applied on every new connection
+    SQLITE_PERFORMANCE_PROFILE: bool = False
+    SQLITE_MMAP_SIZE: int = 268435456
+    SQLITE_CACHE_SIZE: int = -64000  # negative = KiB
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+
+    # Default Cache-Control for /countries_api GETs (per-route overrides in app.api.countries)
+    API_CACHE_MAX_AGE: int = 60
+    API_CACHE_STALE_WHILE_REVALIDATE: int = 300
+
+    # Serve country reads from cached, pre-serialized JSON rows instead of
+    # validating every row through the response model
+    FAST_JSON_RESPONSES: bool = False
+
+    # Responses smaller than this are sent uncompressed
+    COMPRESSION_MINIMUM_SIZE: int = 500
+    # Compressed /countries_api bodies kept per URL, encoding and dataset version
+    COMPRESSION_CACHE_ENTRIES: int = 256
+
+    # Password hashing: bcrypt cost, dedicated worker threads, and how long a
+    # successful login is remembered so repeat logins skip bcrypt
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_CACHE_TTL_SECONDS: int = 300
+    PASSWORD_CACHE_MAX_ENTRIES: int = 10000
+
+    # Server-side sessions ("memory" per process, or "sqlite" shared by workers);
+    # idle sessions expire after ACCESS_TOKEN_EXPIRE_MINUTES
+    SESSION_BACKEND: str = "memory"
+    SESSION_SQLITE_PATH: str = "./sessions.db"
+    SESSION_MAX_ENTRIES: int = 10000
+    SESSION_HTTPS_ONLY: bool = False
+
+    # Let requests sent with an "X-Profile: 1" header return a profile of
+    # themselves (pyinstrument when installed, cProfile otherwise)
+    PROFILING_ENABLED: bool = False
+
+    # Jinja2: where compiled templates are cached (empty = system temp dir),
+    # whether to stat template files for changes, and how many rendered
+    # page fragments (country table, same-region list) to keep
+    TEMPLATE_BYTECODE_CACHE_DIR: str = ""
+    TEMPLATE_AUTO_RELOAD: bool = True
+    FRAGMENT_CACHE_ENTRIES: int = 512
+
+    # /countries_api/export: rows fetched per cursor batch, and the largest
+    # export (raw plus compressed) kept in memory for repeat downloads
+    EXPORT_BATCH_SIZE: int = 1000
+    EXPORT_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+
+    # Largest number of items one bulk create / update / delete may carry;
+    # bigger requests get 413
+    BULK_MAX_ITEMS: int = 1000
+
+    # Opt-in: hold single-country API writes for up to WRITE_COALESCE_WINDOW_MS
+    # and commit everything that arrived meanwhile (at most
+    # WRITE_COALESCE_MAX_BATCH writes) in one transaction
+    WRITE_COALESCING: bool = False
+    WRITE_COALESCE_WINDOW_MS: int = 10
+    WRITE_COALESCE_MAX_BATCH: int = 200
+
+    # /countries_api/changes: largest page, and how often an idle event
+    # stream re-reads the change log and sends a keep-alive
+    CHANGES_MAX_PAGE_SIZE: int = 1000
+    CHANGES_STREAM_HEARTBEAT_SECONDS: float = 15.0
+
+    # Startup: warm the country caches, templates and password hashing before
+    # /readyz reports ready. With SNAPSHOT_FILE set, the country snapshot is
+    # restored from that file when it matches the change log, and re-saved
+    # whenever it had to be rebuilt
+    STARTUP_WARMUP: bool = True
+    SNAPSHOT_FILE: str = ""
+
+    # How often (seconds) the change log is checked for writes made by other
+    # processes (ingest, backfills, other workers); the country snapshot and
+    # everything derived from it are rebuilt when it has moved. 0 disables
+    SNAPSHOT_REFRESH_SECONDS: float = 5.0
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,137 @@
+# app/core/http_cache.py
+"""
+Conditional GET support for the JSON API.
+
+Every cacheable response carries a strong ETag derived from the dataset
+version (bumped by app.services.country_events on each write) and a
+per-route Cache-Control policy. A matching If-None-Match is answered with
+304 before the request reaches the router, so nothing is queried or
+serialized.
+"""
+import secrets
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.routing import Match
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.services import country_events
+
+# Distinguishes processes so a restart never reuses an old version's ETag
+BOOT_ID = secrets.token_hex(4)
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    max_age: int = 60
+    stale_while_revalidate: int = 0
+    # False for routes whose body doesn't follow the dataset version (e.g.
+    # data written by other processes): no version ETag, no 304 and no
+    # cached compressed body
+    versioned: bool = True
+
+    @property
+    def header(self) -> str:
+        if not self.versioned:
+            return "no-cache"
+        value = f"public, max-age={self.max_age}"
+        if self.stale_while_revalidate:
+            value += f", stale-while-revalidate={self.stale_while_revalidate}"
+        return value
+
+
+def current_etag(version: Optional[int] = None) -> str:
+    """The ETag of ``version`` (by default the current one) of the country data."""
+    if version is None:
+        version = country_events.current_version()
+    return f'"{BOOT_ID}-{version}"'
+
+
+# Suffixes app.core.compression adds to an ETag per content-encoding
+CONTENT_ENCODINGS = ("gzip", "br", "zstd")
+
+
+def etag_matches(if_none_match: Optional[str], etag: str, exact: bool = False) -> Optional[str]:
+    """
+    Return the tag from If-None-Match that is current, if any. Encoded
+    representations carry the same tag with an encoding suffix
+    (``"<etag>-gzip"``, see app.core.compression) and match too, unless
+    ``exact`` is set (for tags that already name their representation, like
+    the per-format /export tags).
+    """
+    if not if_none_match:
+        return None
+    if if_none_match.strip() == "*":
+        return etag
+    current = {etag}
+    if not exact:
+        current.update(f'{etag[:-1]}-{encoding}"' for encoding in CONTENT_ENCODINGS)
+    for tag in if_none_match.split(","):
+        tag = tag.strip().removeprefix("W/")
+        if tag in current:
+            return tag
+    return None
+
+
+class HTTPCacheMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        prefix: str,
+        default_policy: CachePolicy,
+        policies: Optional[Dict[str, CachePolicy]] = None,
+    ):
+        self.app = app
+        self.prefix = prefix
+        self.default_policy = default_policy
+        # Keyed by route path relative to ``prefix``, e.g. "/search/suggest"
+        self.policies = policies or {}
+
+    def policy_for(self, scope: Scope) -> CachePolicy:
+        for route in scope["app"].router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return self.policies.get(route.path[len(self.prefix):], self.default_policy)
+        return self.default_policy
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in ("GET", "HEAD")
+            or not scope["path"].startswith(self.prefix)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        policy = self.policy_for(scope)
+        if not policy.versioned:
+            async def send_with_cache_control(message):
+                if message["type"] == "http.response.start":
+                    MutableHeaders(scope=message).setdefault("cache-control", policy.header)
+                await send(message)
+
+            await self.app(scope, receive, send_with_cache_control)
+            return
+
+        etag = current_etag()
+        cache_control = policy.header
+
+        matched = etag_matches(Headers(scope=scope).get("if-none-match"), etag)
+        if matched:
+            await send({
+                "type": "http.response.start",
+                "status": 304,
+                "headers": [(b"etag", matched.encode()), (b"cache-control", cache_control.encode())],
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_with_cache_headers(message):
+            if message["type"] == "http.response.start" and 200 <= message["status"] < 300:
+                headers = MutableHeaders(scope=message)
+                headers.setdefault("etag", etag)
+                headers.setdefault("cache-control", cache_control)
+            await send(message)
+
+        await self.app(scope, receive, send_with_cache_headers)
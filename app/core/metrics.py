@@ -0,0 +1,290 @@
+# app/core/metrics.py
+"""
+Request instrumentation: per-route latency histograms, SQL statement counts
+and time (via SQLAlchemy cursor events), and template render time, exposed
+in Prometheus text format on /metrics.
+
+Per-request numbers are collected in a ``RequestStats`` held in a context
+variable. ``run_in_threadpool`` and ``AsyncSession.run_sync`` both carry the
+context along, so statements issued from worker threads or greenlets are
+attributed to the request that issued them. They are also reported on each
+response as a ``Server-Timing`` header.
+
+Setting PROFILING_ENABLED additionally lets a request carry ``X-Profile: 1``
+to get a profile of itself back instead of its normal response (pyinstrument
+when installed, cProfile otherwise).
+"""
+import io
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Optional, Sequence, Tuple
+
+from jinja2 import Template
+from sqlalchemy import event
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+PROFILE_HEADER = "x-profile"
+
+
+class RequestStats:
+    __slots__ = ("queries", "sql_seconds", "template_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.template_seconds = 0.0
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (+Inf last), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            series = sorted((labels, list(counts), total) for labels, (counts, total) in self._series.items())
+        for labels, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                bucket_labels = _labels(self.label_names, labels, 'le="%s"' % le)
+                yield f"{self.name}_bucket{bucket_labels} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.label_names, labels)} {total}"
+            yield f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Sequence[str]):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float, *labels: str):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_labels(self.label_names, labels)} {value}"
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Request latency by route.",
+    ("method", "route", "status"), LATENCY_BUCKETS,
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries", "SQL statements issued per request.",
+    ("method", "route"), QUERY_COUNT_BUCKETS,
+)
+DB_QUERIES = Counter("db_queries_total", "SQL statements executed, by route.", ("route",))
+DB_SECONDS = Counter("db_query_seconds_total", "Time spent executing SQL, by route.", ("route",))
+TEMPLATE_RENDER = Histogram(
+    "template_render_seconds", "Jinja2 template render time.", ("template",), LATENCY_BUCKETS,
+)
+
+REGISTRY = (REQUEST_LATENCY, REQUEST_QUERIES, DB_QUERIES, DB_SECONDS, TEMPLATE_RENDER)
+
+
+def render_metrics() -> str:
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+
+# ---- SQL ---------------------------------------------------------------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.sql_seconds += elapsed
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+
+def instrument_engine(sync_engine):
+    """Count and time statements on ``sync_engine`` (use ``.sync_engine`` for async engines)."""
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(sync_engine, "handle_error", _handle_error)
+    return sync_engine
+
+
+# ---- Templates ---------------------------------------------------------
+
+class TimedTemplate(Template):
+    def render(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            TEMPLATE_RENDER.observe(elapsed, self.name or "<string>")
+            stats = _request_stats.get()
+            if stats is not None:
+                stats.template_seconds += elapsed
+
+
+def instrument_templates(templates):
+    """Time every render of a ``Jinja2Templates`` instance; call before first use."""
+    templates.env.template_class = TimedTemplate
+    return templates
+
+
+# ---- Middleware --------------------------------------------------------
+
+def route_label(scope: Scope) -> str:
+    # FastAPI records the matched route in the scope; requests answered before
+    # routing (e.g. 304s from HTTPCacheMiddleware) are resolved here instead
+    route = scope.get("route")
+    if route is None and "app" in scope:
+        for candidate in scope["app"].router.routes:
+            if candidate.matches(scope)[0] == Match.FULL:
+                route = candidate
+                break
+    # Unmatched paths share one label to keep metric cardinality bounded
+    return getattr(route, "path", "<unmatched>")
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp, profiling: bool = False, exclude: Sequence[str] = ("/metrics",)):
+        self.app = app
+        self.profiling = profiling
+        self.exclude = set(exclude)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"] in self.exclude:
+            await self.app(scope, receive, send)
+            return
+
+        if self.profiling and Headers(scope=scope).get(PROFILE_HEADER):
+            await self.profile(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                elapsed = time.perf_counter() - start
+                MutableHeaders(scope=message).append(
+                    "Server-Timing",
+                    f'db;dur={stats.sql_seconds * 1000:.2f};desc="{stats.queries} queries", '
+                    f"tpl;dur={stats.template_seconds * 1000:.2f}, app;dur={elapsed * 1000:.2f}",
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_stats.reset(token)
+            elapsed = time.perf_counter() - start
+            route, method = route_label(scope), scope["method"]
+            REQUEST_LATENCY.observe(elapsed, method, route, str(status))
+            REQUEST_QUERIES.observe(stats.queries, method, route)
+            if stats.queries:
+                DB_QUERIES.inc(stats.queries, route)
+                DB_SECONDS.inc(stats.sql_seconds, route)
+
+    async def profile(self, scope: Scope, receive: Receive, send: Send):
+        """
+        Run the request under a profiler and answer with the report. The
+        profiler sees the whole event loop, so profile on a quiet instance.
+        """
+        async def discard(message: Message):
+            pass
+
+        # Imported here: profilers are only needed when PROFILING_ENABLED is used
+        try:
+            from pyinstrument import Profiler
+        except ImportError:  # optional
+            Profiler = None
+
+        if Profiler is not None:
+            profiler = Profiler(async_mode="enabled")
+            profiler.start()
+            try:
+                await self.app(scope, receive, discard)
+            finally:
+                profiler.stop()
+            body, media_type = profiler.output_html().encode(), "text/html; charset=utf-8"
+        else:
+            import cProfile
+            import pstats
+
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                await self.app(scope, receive, discard)
+            finally:
+                profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(60)
+            body, media_type = out.getvalue().encode(), "text/plain; charset=utf-8"
+
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", media_type.encode()),
+                (b"content-length", str(len(body)).encode()),
+                (b"cache-control", b"no-store"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
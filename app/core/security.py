@@ -1,8 +1,33 @@
 # app/core/security.py
+import asyncio
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
 from passlib.context import CryptContext
 from fastapi import Request, HTTPException
 from starlette.status import HTTP_401_UNAUTHORIZED
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.core.config import settings
+
+# min_rounds == default_rounds, so raising BCRYPT_ROUNDS flags older hashes
+# for a transparent rehash on the next successful login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+)
+
+# bcrypt releases the GIL, so a small dedicated thread pool keeps login bursts
+# off the shared threadpool that serves every sync request handler
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash",
+)
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -10,6 +35,73 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+async def hash_password_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, hash_password, password)
+
+
+class VerifiedCredentialCache:
+    """
+    Remembers recent successful logins as an HMAC of the password (keyed with a
+    per-process secret, never the password itself), bound to the stored hash so
+    a password change invalidates the entry.
+    """
+
+    def __init__(self, ttl: int, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._key = secrets.token_bytes(32)
+        self._entries: "OrderedDict[str, Tuple[str, bytes, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _digest(self, username: str, password: str) -> bytes:
+        return hmac.new(self._key, f"{username}\0{password}".encode("utf-8"), hashlib.sha256).digest()
+
+    def check(self, username: str, password: str, hashed_password: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None:
+                return False
+            cached_hash, digest, expires = entry
+            if expires < time.monotonic() or cached_hash != hashed_password:
+                del self._entries[username]
+                return False
+        return hmac.compare_digest(digest, self._digest(username, password))
+
+    def remember(self, username: str, password: str, hashed_password: str):
+        entry = (hashed_password, self._digest(username, password), time.monotonic() + self.ttl)
+        with self._lock:
+            self._entries[username] = entry
+            self._entries.move_to_end(username)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def forget(self, username: str):
+        with self._lock:
+            self._entries.pop(username, None)
+
+
+verified_credentials = VerifiedCredentialCache(
+    ttl=settings.PASSWORD_CACHE_TTL_SECONDS,
+    max_entries=settings.PASSWORD_CACHE_MAX_ENTRIES,
+)
+
+async def verify_password_async(username: str, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a login off the event loop. Returns ``(valid, new_hash)`` where
+    ``new_hash`` is set when the stored hash should be replaced (e.g. after
+    BCRYPT_ROUNDS was raised).
+    """
+    if verified_credentials.check(username, plain_password, hashed_password):
+        return True, None
+    loop = asyncio.get_running_loop()
+    valid, new_hash = await loop.run_in_executor(
+        _password_executor, pwd_context.verify_and_update, plain_password, hashed_password
+    )
+    if valid:
+        verified_credentials.remember(username, plain_password, new_hash or hashed_password)
+    return valid, new_hash
+
 
 from fastapi import Request, HTTPException, status, Depends
 
@@ -21,4 +113,4 @@ def get_current_user_session(request: Request):
             detail="Not authenticated",
             headers={"Location": "/login"}
         )
-    return user
\ No newline at end of file
+    return user
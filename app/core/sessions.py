@@ -0,0 +1,227 @@
+# app/core/sessions.py
+"""
+Server-side sessions keyed by an opaque, random session id cookie.
+
+Session data lives in a pluggable backend (in-process LRU with TTL, or a
+SQLite file shared by workers) instead of a signed cookie, so sessions can be
+revoked server-side and the logged-in user's record is available on
+``request.state.user`` without a database query.
+"""
+import json
+import secrets
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+
+class SessionBackend(ABC):
+    # True when calls do I/O; the middleware then runs them in the threadpool
+    blocking = False
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    def set(self, session_id: str, data: dict, ttl: int):
+        ...
+
+    @abstractmethod
+    def touch(self, session_id: str, ttl: int):
+        ...
+
+    @abstractmethod
+    def delete(self, session_id: str):
+        ...
+
+    @abstractmethod
+    def delete_user(self, username: str) -> int:
+        """Revoke every session of ``username``; returns how many were removed."""
+
+
+class MemorySessionBackend(SessionBackend):
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # id -> (json, username, expires)
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return None
+            if entry[2] < time.time():
+                del self._entries[session_id]
+                return None
+            self._entries.move_to_end(session_id)
+            return json.loads(entry[0])
+
+    def set(self, session_id, data, ttl):
+        with self._lock:
+            self._entries[session_id] = (json.dumps(data), data.get("user"), time.time() + ttl)
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def touch(self, session_id, ttl):
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None:
+                self._entries[session_id] = (entry[0], entry[1], time.time() + ttl)
+
+    def delete(self, session_id):
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+    def delete_user(self, username):
+        with self._lock:
+            doomed = [sid for sid, entry in self._entries.items() if entry[1] == username]
+            for sid in doomed:
+                del self._entries[sid]
+            return len(doomed)
+
+
+class SqliteSessionBackend(SessionBackend):
+    PURGE_EVERY = 100  # writes between sweeps of expired rows
+    blocking = True
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        self._writes = 0
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "id TEXT PRIMARY KEY, username TEXT, data TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_sessions_username ON sessions (username)")
+
+    def get(self, session_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM sessions WHERE id = ? AND expires >= ?", (session_id, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, session_id, data, ttl):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (id, username, data, expires) VALUES (?, ?, ?, ?)",
+                (session_id, data.get("user"), json.dumps(data), now + ttl),
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                self._conn.execute("DELETE FROM sessions WHERE expires < ?", (now,))
+
+    def touch(self, session_id, ttl):
+        with self._lock:
+            self._conn.execute("UPDATE sessions SET expires = ? WHERE id = ?", (time.time() + ttl, session_id))
+
+    def delete(self, session_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def delete_user(self, username):
+        with self._lock:
+            return self._conn.execute("DELETE FROM sessions WHERE username = ?", (username,)).rowcount
+
+
+class ServerSessionMiddleware:
+    """
+    Drop-in replacement for Starlette's SessionMiddleware: ``request.session``
+    works as before, but only the session id travels in the cookie.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        backend: SessionBackend,
+        max_age: int,
+        cookie_name: str = "session",
+        https_only: bool = False,
+        same_site: str = "lax",
+    ):
+        self.app = app
+        self.backend = backend
+        self.max_age = max_age
+        self.cookie_name = cookie_name
+        self.security_flags = f"httponly; samesite={same_site}" + ("; secure" if https_only else "")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        session_id = HTTPConnection(scope).cookies.get(self.cookie_name)
+        initial = await self._call(self.backend.get, session_id) if session_id else None
+        if initial is None:
+            session_id = None
+            initial = {}
+        scope["session"] = dict(initial)
+        scope.setdefault("state", {})["user"] = initial.get("user_record")
+
+        async def send_with_session(message: Message):
+            nonlocal session_id
+            if message["type"] == "http.response.start":
+                session = scope["session"]
+                headers = MutableHeaders(scope=message)
+                if not session:
+                    if session_id:
+                        await self._call(self.backend.delete, session_id)
+                        headers.append("Set-Cookie", self._cookie("null", max_age=0))
+                elif session != initial or not session_id:
+                    if session_id and session.get("user") != initial.get("user"):
+                        # New identity, new id: avoids session fixation
+                        await self._call(self.backend.delete, session_id)
+                        session_id = None
+                    session_id = session_id or secrets.token_urlsafe(32)
+                    await self._call(self.backend.set, session_id, session, self.max_age)
+                    headers.append("Set-Cookie", self._cookie(session_id, max_age=self.max_age))
+                else:
+                    # Sliding expiry: extend the stored session and the cookie
+                    # together. Publicly cacheable (API) responses must not
+                    # carry a session cookie; the next page view refreshes it.
+                    await self._call(self.backend.touch, session_id, self.max_age)
+                    if "public" not in headers.get("cache-control", ""):
+                        headers.append("Set-Cookie", self._cookie(session_id, max_age=self.max_age))
+            await send(message)
+
+        await self.app(scope, receive, send_with_session)
+
+    async def _call(self, method, *args):
+        if self.backend.blocking:
+            return await run_in_threadpool(method, *args)
+        return method(*args)
+
+    def _cookie(self, value: str, max_age: int) -> str:
+        return f"{self.cookie_name}={value}; path=/; Max-Age={max_age}; {self.security_flags}"
+
+
+def create_session_backend(kind: str, sqlite_path: str, max_entries: int) -> SessionBackend:
+    if kind == "memory":
+        return MemorySessionBackend(max_entries=max_entries)
+    if kind == "sqlite":
+        return SqliteSessionBackend(sqlite_path)
+    raise ValueError(f"Unknown SESSION_BACKEND '{kind}' (expected 'memory' or 'sqlite')")
+
+
+session_backend = create_session_backend(
+    settings.SESSION_BACKEND, settings.SESSION_SQLITE_PATH, settings.SESSION_MAX_ENTRIES
+)
+
+
+def revoke_user_sessions(username: str) -> int:
+    """Log ``username`` out everywhere (e.g. after a password change)."""
+    return session_backend.delete_user(username)
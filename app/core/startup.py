@@ -0,0 +1,149 @@
+# app/core/startup.py
+"""
+Application lifespan: warm everything a first request would otherwise pay for.
+
+The country snapshot (restored from SNAPSHOT_FILE when possible) and the
+caches derived from it are built, every template is compiled, and the
+bcrypt backend is loaded. Warm-up runs in the threadpool after the server
+starts listening, so ``/healthz`` answers at once, while ``/readyz`` returns
+503 until warm-up has finished. The time spent importing the app and in
+each warm-up step is kept in ``startup.timings`` (milliseconds) and
+reported by ``/readyz``. While the app runs, the change log is checked every
+SNAPSHOT_REFRESH_SECONDS for writes from other processes.
+"""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, Optional
+
+from fastapi import FastAPI
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.security import pwd_context
+from app.core.templates import templates
+from app.crud.write_coalescer import write_coalescer
+from app.db.database import SessionLocal, async_engine, engine
+from app.services import (
+    country_snapshot, country_facets, country_search, country_neighbors, country_stats, country_columns,
+    country_timezones,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class StartupState:
+    def __init__(self):
+        self.ready = False
+        self.error: Optional[str] = None
+        self.timings: Dict[str, float] = {}
+
+    def record(self, step: str, seconds: float):
+        self.timings[step] = round(seconds * 1000, 1)
+
+    @contextmanager
+    def timed(self, step: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(step, time.perf_counter() - started)
+
+    @property
+    def status(self) -> str:
+        if self.error is not None:
+            return "failed"
+        return "ready" if self.ready else "starting"
+
+
+startup = StartupState()
+
+
+def warm_country_data():
+    db = SessionLocal()
+    try:
+        snapshot = None
+        if settings.SNAPSHOT_FILE:
+            with startup.timed("snapshot_restore"):
+                snapshot = country_snapshot.restore_snapshot(db, settings.SNAPSHOT_FILE)
+        if snapshot is None:
+            with startup.timed("snapshot_build"):
+                snapshot = country_snapshot.get_snapshot(db)
+            if settings.SNAPSHOT_FILE:
+                with startup.timed("snapshot_save"):
+                    country_snapshot.save_snapshot(db, settings.SNAPSHOT_FILE)
+    finally:
+        db.close()
+    with startup.timed("derived_caches"):
+        country_facets.facets_for(snapshot)
+        country_search.search_index_for(snapshot)
+        country_neighbors.neighbors_for(snapshot)
+        country_stats.stats_for(snapshot)
+        country_columns.columns_for(snapshot)
+        country_timezones.timezone_index_for(snapshot)
+
+
+def warm_templates():
+    env = templates.env
+    for name in env.list_templates(extensions=["html"]):
+        env.get_template(name)
+
+
+def warm_password_hashing():
+    # Loads the bcrypt backend, which runs passlib's self-tests on first use
+    pwd_context.handler().get_backend()
+
+
+def warm_up():
+    with startup.timed("warmup"):
+        warm_country_data()
+        with startup.timed("templates"):
+            warm_templates()
+        with startup.timed("password_hashing"):
+            warm_password_hashing()
+
+
+async def run_warm_up():
+    try:
+        await run_in_threadpool(warm_up)
+    except Exception as exc:
+        startup.error = repr(exc)
+        logger.exception("Startup warm-up failed")
+    else:
+        startup.ready = True
+
+
+def refresh_country_data() -> bool:
+    db = SessionLocal()
+    try:
+        return country_snapshot.refresh(db)
+    finally:
+        db.close()
+
+
+async def refresh_periodically(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(refresh_country_data)
+        except Exception:
+            logger.exception("Country snapshot refresh failed")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    tasks = []
+    if settings.STARTUP_WARMUP:
+        tasks.append(asyncio.create_task(run_warm_up()))
+    else:
+        startup.ready = True
+    if settings.SNAPSHOT_REFRESH_SECONDS > 0:
+        tasks.append(asyncio.create_task(refresh_periodically(settings.SNAPSHOT_REFRESH_SECONDS)))
+    yield
+    for task in tasks:
+        task.cancel()
+    write_coalescer.close()
+    engine.dispose()
+    if async_engine is not None:
+        await async_engine.dispose()
@@ -0,0 +1,70 @@
+# app/core/templates.py
+"""
+The single Jinja2 environment shared by every HTML router, plus a cache of
+pre-rendered page fragments.
+
+Compiled templates are written to a bytecode cache, so a fresh process
+loads them instead of recompiling. Expensive fragments (the country table,
+the same-region list) are rendered once per dataset version and set of
+filter parameters and then reused as Markup. Fragment keys carry
+``country_events.current_version()``, so a write makes every cached
+fragment unreachable without any explicit invalidation.
+"""
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+from markupsafe import Markup
+
+from app.core.config import settings
+from app.core.metrics import instrument_templates
+from app.services import country_events
+
+TEMPLATE_DIRECTORY = "app/templates"
+
+
+def create_templates() -> Jinja2Templates:
+    env = Environment(
+        loader=FileSystemLoader(TEMPLATE_DIRECTORY),
+        autoescape=True,
+        # None -> a per-user directory under the system temp dir
+        bytecode_cache=FileSystemBytecodeCache(settings.TEMPLATE_BYTECODE_CACHE_DIR or None),
+        auto_reload=settings.TEMPLATE_AUTO_RELOAD,
+    )
+    return instrument_templates(Jinja2Templates(env=env))
+
+
+class FragmentCache:
+    """LRU of rendered fragments keyed by (template, dataset version, key)."""
+
+    def __init__(self, templates: Jinja2Templates, max_entries: int = 512):
+        self.templates = templates
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, Markup]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def version(self) -> int:
+        """Read before loading a fragment's data and pass it to ``render``."""
+        return country_events.current_version()
+
+    def get(self, name: str, key: Hashable, version: Optional[int] = None) -> Optional[Markup]:
+        entry_key = (name, self.version() if version is None else version, key)
+        with self._lock:
+            fragment = self._entries.get(entry_key)
+            if fragment is not None:
+                self._entries.move_to_end(entry_key)
+            return fragment
+
+    def render(self, name: str, key: Hashable, version: int, **context) -> Markup:
+        fragment = Markup(self.templates.get_template(name).render(**context))
+        with self._lock:
+            self._entries[(name, version, key)] = fragment
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return fragment
+
+
+templates = create_templates()
+fragments = FragmentCache(templates, max_entries=settings.FRAGMENT_CACHE_ENTRIES)
@@ -1,8 +1,16 @@
 # app/crud/countries.py
+from typing import List, Optional
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from app.db.models.country import Country
-from app.schemas.country import CountryCreate, CountryUpdate
-from sqlalchemy import func, or_
+from app.db.models.country_change import CountryChange
+from app.db.models.country_language import CountryLanguage
+from app.db.models.country_timezone import CountryTimezone
+from app.schemas.country import CountryCreate, CountryUpdate, CountryBulkUpdate
+from sqlalchemy import func, or_, select
+from app.services import country_events, country_snapshot
+from app.services.country_snapshot import RECORD_FIELDS, CountryRecord
+from app.services.country_timezones import parse_utc_offset
 
 def get_country(db: Session, country_id: int):
     return db.query(Country).filter(Country.id == country_id).first()
@@ -13,10 +21,114 @@ def get_country_by_cca2(db: Session, cca2: str):
 def get_countries(db: Session, skip: int = 0, limit: int = 100):
     return db.query(Country).offset(skip).limit(limit).all()
 
-def create_country(db: Session, country: CountryCreate):
+def get_countries_by_cca2_list(db: Session, codes: List[str]):
+    return db.query(Country).filter(Country.cca2.in_(codes)).all()
+
+def language_entries(languages):
+    return [
+        CountryLanguage(code=code.lower(), name=name)
+        for code, name in (languages or {}).items()
+    ]
+
+def timezone_entries(timezones):
+    return [
+        CountryTimezone(name=name, offset_minutes=parse_utc_offset(name))
+        for name in dict.fromkeys(timezones or ())
+    ]
+
+def new_country(country: CountryCreate) -> Country:
     db_country = Country(**country.dict())
-    db.add(db_country)
+    db_country.language_entries = language_entries(db_country.languages)
+    db_country.timezone_entries = timezone_entries(db_country.timezones)
+    return db_country
+
+def apply_update(db_country: Country, country: CountryUpdate):
+    update_data = country.dict(exclude_unset=True, exclude={"cca2"})
+    for field, value in update_data.items():
+        setattr(db_country, field, value)
+    if "languages" in update_data:
+        db_country.language_entries = language_entries(db_country.languages)
+    if "timezones" in update_data:
+        db_country.timezone_entries = timezone_entries(db_country.timezones)
+
+# Every write adds CountryChange rows to the same transaction as the write
+# itself; the row id is the version the change feed (/changes) hands out.
+
+def change_entry(old: Optional[CountryRecord], new: Optional[CountryRecord]) -> CountryChange:
+    record = new if new is not None else old
+    changed_fields = None
+    if old is None:
+        operation = "create"
+    elif new is None:
+        operation = "delete"
+    else:
+        operation = "update"
+        before, after = old.as_dict(), new.as_dict()
+        changed_fields = [name for name in RECORD_FIELDS if before[name] != after[name]]
+    return CountryChange(
+        country_id=record.id,
+        cca2=record.cca2,
+        operation=operation,
+        changed_fields=changed_fields,
+        data=new.as_dict() if new is not None else None,
+    )
+
+def commit_changes(db: Session, changes):
+    """Log ``changes`` (old, new) pairs, commit, then publish them."""
+    entries = [change_entry(old, new) for old, new in changes]
+    db.add_all(entries)
+    db.flush()
+    change_ids = [entry.id for entry in entries]
     db.commit()
+    country_snapshot.record_changes(change_ids)
+    for old, new in changes:
+        country_events.publish(old, new)
+
+def get_changes(db: Session, since: int = 0, limit: int = 1000):
+    return (
+        db.query(CountryChange)
+        .filter(CountryChange.id > since)
+        .order_by(CountryChange.id)
+        .limit(limit)
+        .all()
+    )
+
+# Staged writes apply one change to the session and flush it, without
+# committing, and return (result, changes). create/update/delete_country
+# commit one of them; app.crud.write_coalescer commits a batch at once.
+
+def stage_create(db: Session, country: CountryCreate):
+    db_country = new_country(country)
+    db.add(db_country)
+    # Flush to get the id, and capture the record before commit expires the object
+    db.flush()
+    record = CountryRecord.from_model(db_country)
+    return record, [(None, record)]
+
+def stage_update(db: Session, cca2: str, country: CountryUpdate):
+    db_country = get_country_by_cca2(db, cca2=cca2)
+    if not db_country:
+        return None, []
+    before = CountryRecord.from_model(db_country)
+    apply_update(db_country, country)
+    db.flush()
+    record = CountryRecord.from_model(db_country)
+    return record, [(before, record)]
+
+def stage_delete(db: Session, cca2: str):
+    db_country = get_country_by_cca2(db, cca2=cca2)
+    if not db_country:
+        return False, []
+    before = CountryRecord.from_model(db_country)
+    db.delete(db_country)
+    db.flush()
+    return True, [(before, None)]
+
+def create_country(db: Session, country: CountryCreate):
+    db_country = new_country(country)
+    db.add(db_country)
+    db.flush()
+    commit_changes(db, [(None, CountryRecord.from_model(db_country))])
     db.refresh(db_country)
     return db_country
 
@@ -26,16 +138,12 @@ def get_countries_by_region(db: Session, region: str):
 def get_countries_by_language(db: Session, language_code: str):
     if len(language_code) <= 3:
         # Search by key (language code)
-        return db.query(Country).filter(
-            func.json_extract(Country.languages, f"$.{language_code.lower()}").isnot(None)
-        ).all()
+        match = CountryLanguage.code == language_code.lower()
     else:
-        # Search by value (language name)
-        # This creates a pattern like: %"French"% to match the value in JSON
-        pattern = f'%"{language_code}"%'
-        return db.query(Country).filter(
-            Country.languages.like(pattern)
-        ).all()
+        # Search by value (language name), exact but case-insensitive
+        match = func.lower(CountryLanguage.name) == language_code.lower()
+    country_ids = select(CountryLanguage.country_id).where(match)
+    return db.query(Country).filter(Country.id.in_(country_ids)).all()
 
 def search_countries(db: Session, name: str):
     return db.query(Country).filter(Country.name_common.ilike(f"%{name}%")).all()
@@ -47,7 +155,7 @@ def get_country_stats(db: Session):
     total_countries = db.query(func.count(Country.id)).scalar()
     total_regions = db.query(func.count(distinct(Country.region))).scalar()
     
-    total_languages = db.query(func.count(distinct(Country.languages))).scalar()
+    total_languages = db.query(func.count(distinct(CountryLanguage.code))).scalar()
     
     return {
         "total_countries": total_countries,
@@ -60,11 +168,10 @@ def update_country(db: Session, cca2: str, country: CountryUpdate):
     if not db_country:
         return None
     
-    update_data = country.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_country, field, value)
+    before = CountryRecord.from_model(db_country)
+    apply_update(db_country, country)
     
-    db.commit()
+    commit_changes(db, [(before, CountryRecord.from_model(db_country))])
     db.refresh(db_country)
     return db_country
 
@@ -73,6 +180,83 @@ def delete_country(db: Session, cca2: str):
     if not db_country:
         return False
     
+    before = CountryRecord.from_model(db_country)
     db.delete(db_country)
-    db.commit()
+    commit_changes(db, [(before, None)])
     return True
+
+
+# Bulk writes: every item is applied in one transaction and reported
+# individually as {"cca2", "status", "detail"}.
+
+def _rollback_bulk(db: Session, results):
+    db.rollback()
+    for result in results:
+        if result["status"] != "error":
+            result.update(status="error", detail="Transaction rolled back: integrity error")
+    return results
+
+def _commit_bulk(db: Session, results, changes):
+    try:
+        commit_changes(db, changes)
+    except IntegrityError:
+        return _rollback_bulk(db, results)
+    return results
+
+def bulk_create_countries(db: Session, countries: List[CountryCreate]):
+    codes = [c.cca2 for c in countries]
+    codes3 = [c.cca3 for c in countries if c.cca3]
+    taken = set()
+    for cca2, cca3 in db.query(Country.cca2, Country.cca3).filter(
+        or_(Country.cca2.in_(codes), Country.cca3.in_(codes3))
+    ):
+        taken.add(("cca2", cca2))
+        taken.add(("cca3", cca3))
+
+    results, created = [], []
+    for country in countries:
+        if ("cca2", country.cca2) in taken or (country.cca3 and ("cca3", country.cca3) in taken):
+            results.append({"cca2": country.cca2, "status": "error", "detail": "Country already exists"})
+            continue
+        taken.add(("cca2", country.cca2))
+        if country.cca3:
+            taken.add(("cca3", country.cca3))
+        db_country = new_country(country)
+        db.add(db_country)
+        created.append(db_country)
+        results.append({"cca2": country.cca2, "status": "created", "detail": None})
+
+    # Flush to get ids, and capture records before commit expires the objects
+    try:
+        db.flush()
+    except IntegrityError:
+        return _rollback_bulk(db, results)
+    changes = [(None, CountryRecord.from_model(c)) for c in created]
+    return _commit_bulk(db, results, changes)
+
+def bulk_update_countries(db: Session, countries: List[CountryBulkUpdate]):
+    existing = {c.cca2: c for c in get_countries_by_cca2_list(db, [c.cca2 for c in countries])}
+    results, changes = [], []
+    for country in countries:
+        db_country = existing.get(country.cca2)
+        if db_country is None:
+            results.append({"cca2": country.cca2, "status": "error", "detail": "Country not found"})
+            continue
+        before = CountryRecord.from_model(db_country)
+        apply_update(db_country, country)
+        changes.append((before, CountryRecord.from_model(db_country)))
+        results.append({"cca2": country.cca2, "status": "updated", "detail": None})
+    return _commit_bulk(db, results, changes)
+
+def bulk_delete_countries(db: Session, codes: List[str]):
+    existing = {c.cca2: c for c in get_countries_by_cca2_list(db, codes)}
+    results, changes = [], []
+    for cca2 in codes:
+        db_country = existing.pop(cca2, None)
+        if db_country is None:
+            results.append({"cca2": cca2, "status": "error", "detail": "Country not found"})
+            continue
+        changes.append((CountryRecord.from_model(db_country), None))
+        db.delete(db_country)
+        results.append({"cca2": cca2, "status": "deleted", "detail": None})
+    return _commit_bulk(db, results, changes)
@@ -0,0 +1,92 @@
+# app/crud/countries_async.py
+"""
+Awaitable counterparts of app.crud.countries for ``async def`` handlers.
+
+With an ``AsyncSession`` the sync CRUD functions run through ``run_sync`` on
+the async driver; with a plain ``Session`` (ASYNC_DATABASE disabled) they run
+in the threadpool. Either way the event loop never blocks on the database.
+With WRITE_COALESCING, single-country writes go through
+app.crud.write_coalescer and are committed in batches instead.
+"""
+from typing import List, Union
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.crud import countries
+from app.crud.write_coalescer import write_coalescer
+from app.schemas.country import CountryCreate, CountryUpdate, CountryBulkUpdate
+from app.services import (
+    country_snapshot, country_facets, country_search, country_neighbors, country_stats, country_columns,
+)
+
+AnySession = Union[AsyncSession, Session]
+
+async def run(db: AnySession, fn, *args, **kwargs):
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
+
+async def get_country_by_cca2(db: AnySession, cca2: str):
+    return await run(db, countries.get_country_by_cca2, cca2)
+
+async def get_countries(db: AnySession, skip: int = 0, limit: int = 100):
+    return await run(db, countries.get_countries, skip=skip, limit=limit)
+
+async def get_countries_by_region(db: AnySession, region: str):
+    return await run(db, countries.get_countries_by_region, region)
+
+async def get_countries_by_language(db: AnySession, language_code: str):
+    return await run(db, countries.get_countries_by_language, language_code)
+
+async def search_countries(db: AnySession, name: str):
+    return await run(db, countries.search_countries, name)
+
+async def create_country(db: AnySession, country: CountryCreate):
+    if settings.WRITE_COALESCING:
+        return await write_coalescer.submit(countries.stage_create, country)
+    return await run(db, countries.create_country, country)
+
+async def update_country(db: AnySession, cca2: str, country: CountryUpdate):
+    if settings.WRITE_COALESCING:
+        return await write_coalescer.submit(countries.stage_update, cca2, country)
+    return await run(db, countries.update_country, cca2, country)
+
+async def delete_country(db: AnySession, cca2: str):
+    if settings.WRITE_COALESCING:
+        return await write_coalescer.submit(countries.stage_delete, cca2)
+    return await run(db, countries.delete_country, cca2)
+
+async def get_changes(db: AnySession, since: int = 0, limit: int = 1000):
+    return await run(db, countries.get_changes, since=since, limit=limit)
+
+async def bulk_create_countries(db: AnySession, items: List[CountryCreate]):
+    return await run(db, countries.bulk_create_countries, items)
+
+async def bulk_update_countries(db: AnySession, items: List[CountryBulkUpdate]):
+    return await run(db, countries.bulk_update_countries, items)
+
+async def bulk_delete_countries(db: AnySession, codes: List[str]):
+    return await run(db, countries.bulk_delete_countries, codes)
+
+async def get_snapshot(db: AnySession):
+    # Only the first read after startup (or an invalidation) touches the DB
+    snapshot = country_snapshot.peek_snapshot()
+    if snapshot is None:
+        snapshot = await run(db, country_snapshot.get_snapshot)
+    return snapshot
+
+async def get_facets(db: AnySession):
+    return country_facets.facets_for(await get_snapshot(db))
+
+async def get_search_index(db: AnySession):
+    return country_search.search_index_for(await get_snapshot(db))
+
+async def get_neighbors(db: AnySession):
+    return country_neighbors.neighbors_for(await get_snapshot(db))
+
+async def get_stats(db: AnySession):
+    return country_stats.stats_for(await get_snapshot(db))
+
+async def get_columns(db: AnySession):
+    return country_columns.columns_for(await get_snapshot(db))
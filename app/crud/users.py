@@ -1,4 +1,5 @@
 # app/crud/users.py
+from typing import Optional
 from sqlalchemy.orm import Session
 from app.db.models.user import User
 from app.schemas.user import UserCreate
@@ -7,8 +8,9 @@ from app.core.security import hash_password
 def get_user_by_username(db: Session, username: str):
     return db.query(User).filter(User.username == username).first()
 
-def create_user(db: Session, user: UserCreate):
-    hashed_password = hash_password(user.password)
+def create_user(db: Session, user: UserCreate, hashed_password: Optional[str] = None):
+    if hashed_password is None:
+        hashed_password = hash_password(user.password)
     db_user = User(
         username=user.username,
         email=user.email,
@@ -18,3 +20,8 @@ def create_user(db: Session, user: UserCreate):
     db.commit()
     db.refresh(db_user)
     return db_user
+
+def update_password_hash(db: Session, user: User, hashed_password: str):
+    user.hashed_password = hashed_password
+    db.commit()
+    return user
@@ -0,0 +1,16 @@
+# app/crud/users_async.py
+"""Awaitable counterparts of app.crud.users; see app.crud.countries_async."""
+from typing import Optional
+from app.crud import users
+from app.crud.countries_async import AnySession, run
+from app.db.models.user import User
+from app.schemas.user import UserCreate
+
+async def get_user_by_username(db: AnySession, username: str):
+    return await run(db, users.get_user_by_username, username)
+
+async def create_user(db: AnySession, user: UserCreate, hashed_password: Optional[str] = None):
+    return await run(db, users.create_user, user, hashed_password=hashed_password)
+
+async def update_password_hash(db: AnySession, user: User, hashed_password: str):
+    return await run(db, users.update_password_hash, user, hashed_password)
@@ -0,0 +1,108 @@
+# app/crud/write_coalescer.py
+"""
+Opt-in (WRITE_COALESCING) batching of single-country API writes.
+
+Each create/update/delete is queued instead of committed on its own. A
+background task waits WRITE_COALESCE_WINDOW_MS after the first queued write,
+then applies everything that arrived meanwhile with the staged CRUD
+functions and commits it, change log rows included, in one transaction.
+Each caller still gets its own result. If the batch fails (e.g. one create
+hits a unique constraint), it is rolled back and every write is retried in
+its own transaction, so one bad write never fails its neighbours.
+
+Batches run on a sync ``SessionLocal`` session in the threadpool, whatever
+ASYNC_DATABASE is set to.
+"""
+import asyncio
+from typing import Callable, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.crud import countries
+from app.db.database import SessionLocal
+
+# (succeeded, result or exception) per queued write
+Outcome = Tuple[bool, object]
+
+
+class WriteCoalescer:
+    def __init__(self, window_ms: int = 10, max_batch: int = 200):
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def submit(self, stage: Callable, *args):
+        """Queue ``stage(db, *args)`` (a countries.stage_* function) and await its result."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # First write on this event loop: start its batching task
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run())
+        future = loop.create_future()
+        self._queue.put_nowait((stage, args, future))
+        return await future
+
+    def close(self):
+        """Stop the batching task (at shutdown, once in-flight requests are done)."""
+        task, self._task, self._loop = self._task, None, None
+        if task is not None:
+            task.cancel()
+
+    async def _run(self):
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            if self.window and queue.qsize() < self.max_batch - 1:
+                await asyncio.sleep(self.window)
+            while len(batch) < self.max_batch and not queue.empty():
+                batch.append(queue.get_nowait())
+            writes = [(stage, args) for stage, args, _ in batch]
+            try:
+                outcomes = await run_in_threadpool(self.apply, writes)
+            except Exception as exc:
+                outcomes = [(False, exc)] * len(batch)
+            for (_, _, future), (succeeded, value) in zip(batch, outcomes):
+                if future.done():  # caller went away
+                    continue
+                if succeeded:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+    def apply(self, writes) -> List[Outcome]:
+        db = SessionLocal()
+        try:
+            results, changes = [], []
+            try:
+                for stage, args in writes:
+                    result, staged = stage(db, *args)
+                    results.append(result)
+                    changes.extend(staged)
+                countries.commit_changes(db, changes)
+                return [(True, result) for result in results]
+            except Exception:
+                db.rollback()
+                if len(writes) == 1:
+                    raise
+            return [self.apply_one(db, stage, args) for stage, args in writes]
+        finally:
+            db.close()
+
+    def apply_one(self, db, stage: Callable, args) -> Outcome:
+        try:
+            result, changes = stage(db, *args)
+            countries.commit_changes(db, changes)
+            return True, result
+        except Exception as exc:
+            db.rollback()
+            return False, exc
+
+
+write_coalescer = WriteCoalescer(
+    window_ms=settings.WRITE_COALESCE_WINDOW_MS,
+    max_batch=settings.WRITE_COALESCE_MAX_BATCH,
+)
@@ -1,16 +1,70 @@
 # app/db/database.py
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
-import os
-from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.metrics import instrument_engine
 
-load_dotenv()
+DATABASE_URL = settings.DATABASE_URL
 
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./countries.db")
+# Async driver used for each sync dialect when ASYNC_DATABASE is enabled
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+def async_database_url(url: str) -> str:
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername)).render_as_string(hide_password=False)
+
+def engine_options(url: str) -> dict:
+    url = make_url(url)
+    options = {}
+    if url.get_backend_name() == "sqlite":
+        options["connect_args"] = {"check_same_thread": False}
+        if url.database in (None, "", ":memory:"):
+            # In-memory databases live on a single connection; keep SQLAlchemy's default pool
+            return options
+    options.update(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    return options
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        # WAL lets readers proceed while the web UI writes
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+        cursor.execute(f"PRAGMA cache_size={int(settings.SQLITE_CACHE_SIZE)}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    finally:
+        cursor.close()
+
+def configure_engine(sync_engine):
+    if sync_engine.dialect.name == "sqlite" and settings.SQLITE_PERFORMANCE_PROFILE:
+        event.listen(sync_engine, "connect", apply_sqlite_pragmas)
+    # Per-request query count and SQL time for app.core.metrics
+    instrument_engine(sync_engine)
+    return sync_engine
+
+engine = configure_engine(create_engine(DATABASE_URL, **engine_options(DATABASE_URL)))
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
 
+async_engine = None
+AsyncSessionLocal = None
+if settings.ASYNC_DATABASE:
+    async_engine = create_async_engine(async_database_url(DATABASE_URL), **engine_options(DATABASE_URL))
+    configure_engine(async_engine.sync_engine)
+    # Handlers serialize returned rows after the commit, outside the greenlet
+    AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 def get_db():
@@ -18,4 +72,20 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    """
+    Session dependency for ``async def`` handlers. Yields an ``AsyncSession``
+    when ASYNC_DATABASE is enabled, otherwise a plain ``Session`` whose work
+    app.crud.countries_async pushes onto the threadpool.
+    """
+    if AsyncSessionLocal is None:
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            await run_in_threadpool(db.close)
+    else:
+        async with AsyncSessionLocal() as db:
+            yield db
@@ -1,6 +1,9 @@
 # app/db/models/country.py
 from sqlalchemy import Column, Integer, String, Float, Boolean, JSON
+from sqlalchemy.orm import relationship
 from app.db.database import Base
+from app.db.models.country_language import CountryLanguage
+from app.db.models.country_timezone import CountryTimezone
 
 class Country(Base):
     __tablename__ = "countries"
@@ -19,4 +22,7 @@ class Country(Base):
     flag_url = Column(String, nullable=True)
     capital = Column(String(100), nullable=True)
     timezones = Column(JSON, nullable=True)
-    languages = Column(JSON, nullable=True)
\ No newline at end of file
+    languages = Column(JSON, nullable=True)
+
+    language_entries = relationship(CountryLanguage, cascade="all, delete-orphan")
+    timezone_entries = relationship(CountryTimezone, cascade="all, delete-orphan")
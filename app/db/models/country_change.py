@@ -0,0 +1,21 @@
+# app/db/models/country_change.py
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, DateTime, JSON
+from app.db.database import Base
+
+# Append-only log of country writes; ``id`` is the change feed version
+class CountryChange(Base):
+    __tablename__ = "country_changes"
+    # AUTOINCREMENT on SQLite, so a version is never handed out twice
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = Column(Integer, primary_key=True)
+    # No foreign key: the log outlives deleted countries
+    country_id = Column(Integer, nullable=False, index=True)
+    cca2 = Column(String(2), nullable=False)
+    operation = Column(String(10), nullable=False)  # create / update / delete
+    # Fields that differ from the previous version (updates only)
+    changed_fields = Column(JSON, nullable=True)
+    # The country after the write; NULL for deletes
+    data = Column(JSON, nullable=True)
+    changed_at = Column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
@@ -0,0 +1,16 @@
+# app/db/models/country_language.py
+from sqlalchemy import Column, Integer, String, ForeignKey, Index, func
+from app.db.database import Base
+
+class CountryLanguage(Base):
+    __tablename__ = "country_languages"
+
+    id = Column(Integer, primary_key=True, index=True)
+    country_id = Column(Integer, ForeignKey("countries.id", ondelete="CASCADE"), nullable=False, index=True)
+    code = Column(String(10), nullable=False, index=True)
+    name = Column(String(100), nullable=True)
+
+    __table_args__ = (
+        # Name lookups are case-insensitive, so index the lowered value
+        Index("ix_country_languages_name_lower", func.lower(name)),
+    )
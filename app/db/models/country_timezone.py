@@ -0,0 +1,12 @@
+# app/db/models/country_timezone.py
+from sqlalchemy import Column, Integer, String, ForeignKey
+from app.db.database import Base
+
+class CountryTimezone(Base):
+    __tablename__ = "country_timezones"
+
+    id = Column(Integer, primary_key=True, index=True)
+    country_id = Column(Integer, ForeignKey("countries.id", ondelete="CASCADE"), nullable=False, index=True)
+    name = Column(String(20), nullable=False)
+    # Minutes east of UTC ("UTC+05:30" -> 330); NULL when the name isn't a UTC offset
+    offset_minutes = Column(Integer, nullable=True, index=True)
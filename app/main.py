@@ -1,25 +1,70 @@
 
+import time
+
+# Measured from here, so /readyz reports how long importing the app took
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI
-from starlette.middleware.sessions import SessionMiddleware
 from app.routes import auth_router, country_router
-from app.api.countries import router
+from app.api.countries import router, CACHE_POLICIES
+from app.api.health import router as health_router
+from app.api.metrics import router as metrics_router
+from app.core.config import settings
+from app.core.http_cache import CachePolicy, HTTPCacheMiddleware
+from app.core.compression import CompressionMiddleware
+from app.core.sessions import ServerSessionMiddleware, session_backend
+from app.core.metrics import MetricsMiddleware
+from app.core.startup import lifespan, startup
 from starlette.middleware.base import BaseHTTPMiddleware
 from fastapi.responses import Response
 
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+
+API_PREFIX = "/countries_api"
 
 class NoCacheMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request, call_next):
         response: Response = await call_next(request)
+        # API responses are cached by HTTPCacheMiddleware; only HTML pages are no-store
+        if request.url.path.startswith(API_PREFIX):
+            return response
         response.headers["Cache-Control"] = "no-store"
         response.headers["Pragma"] = "no-cache"
         response.headers["Expires"] = "0"
         return response
     
 app.add_middleware(NoCacheMiddleware)
-app.add_middleware(SessionMiddleware, secret_key="supersecret")
-app.include_router(router, prefix="/countries_api", tags=["countries"])
+# Inside HTTPCacheMiddleware, so conditional GETs are answered before anything is compressed
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    cache_prefix=API_PREFIX,
+    cache_size=settings.COMPRESSION_CACHE_ENTRIES,
+    uncached_paths=[API_PREFIX + path for path, policy in CACHE_POLICIES.items() if not policy.versioned],
+)
+app.add_middleware(
+    HTTPCacheMiddleware,
+    prefix=API_PREFIX,
+    default_policy=CachePolicy(
+        max_age=settings.API_CACHE_MAX_AGE,
+        stale_while_revalidate=settings.API_CACHE_STALE_WHILE_REVALIDATE,
+    ),
+    policies=CACHE_POLICIES,
+)
+app.add_middleware(
+    ServerSessionMiddleware,
+    backend=session_backend,
+    max_age=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    https_only=settings.SESSION_HTTPS_ONLY,
+)
+# Outermost, so latency covers every other middleware
+app.add_middleware(MetricsMiddleware, profiling=settings.PROFILING_ENABLED)
+app.include_router(router, prefix=API_PREFIX, tags=["countries"])
 app.include_router(auth_router, tags=["Web Interface"])
 app.include_router(country_router, tags=["Web Interface"])
+app.include_router(metrics_router)
+app.include_router(health_router)
+
+startup.record("import", time.perf_counter() - _import_started)
 
@@ -1,13 +1,15 @@
 from fastapi import APIRouter, Depends, Request, Form, status
 from fastapi.responses import RedirectResponse
-from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
-from app.db.database import get_db
-from app.crud import users
-from app.core.security import verify_password
+from pydantic import ValidationError
+from app.db.database import get_async_db
+from app.crud import users_async
+from app.crud.countries_async import AnySession
+from app.core.security import hash_password_async, verify_password_async
+from app.core.sessions import revoke_user_sessions
+from app.core.templates import templates
+from app.schemas.user import UserCreate
 
 auth_router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
 
 # signup
 @auth_router.get("/signup")
@@ -15,11 +17,17 @@ def register_get(request: Request):
     return templates.TemplateResponse("signup.html", {"request": request})
 
 @auth_router.post("/signup")
-def register_post(request: Request, username: str = Form(...), email: str = Form(...), password: str = Form(...), db: Session = Depends(get_db)):
-    user = users.get_user_by_username(db, username)
+async def register_post(request: Request, username: str = Form(...), email: str = Form(...), password: str = Form(...), db: AnySession = Depends(get_async_db)):
+    user = await users_async.get_user_by_username(db, username)
     if user:
         return templates.TemplateResponse("signup.html", {"request": request, "error": "User already exists"})
-    users.create_user(db, username, email, password)
+    try:
+        new_user = UserCreate(username=username, email=email, password=password)
+    except ValidationError:
+        return templates.TemplateResponse("signup.html", {"request": request, "error": "Invalid email address"})
+    # bcrypt runs on the dedicated password pool, not the event loop
+    hashed_password = await hash_password_async(password)
+    await users_async.create_user(db, new_user, hashed_password=hashed_password)
     return RedirectResponse(url="/login", status_code=303)
 
 # Login
@@ -28,15 +36,24 @@ def login_get(request: Request):
     return templates.TemplateResponse("login.html", {"request": request})
 
 @auth_router.post("/login")
-def login_post(request: Request, username: str = Form(...), password: str = Form(...), db: Session = Depends(get_db)):
-    user = users.get_user_by_username(db, username)
-    if not user or not verify_password(password, user.hashed_password):
+async def login_post(request: Request, username: str = Form(...), password: str = Form(...), db: AnySession = Depends(get_async_db)):
+    user = await users_async.get_user_by_username(db, username)
+    if not user:
         return templates.TemplateResponse("login.html", {"request": request, "error": "Invalid credentials"})
+    valid, new_hash = await verify_password_async(user.username, password, user.hashed_password)
+    if not valid:
+        return templates.TemplateResponse("login.html", {"request": request, "error": "Invalid credentials"})
+    if new_hash:
+        await users_async.update_password_hash(db, user, new_hash)
     request.session["user"] = user.username
+    # Cached on the server-side session and exposed as request.state.user
+    request.session["user_record"] = {"id": user.id, "username": user.username, "email": user.email}
     return RedirectResponse(url="/", status_code=303)
 
 # Logout
 @auth_router.get("/logout")
-def logout(request: Request):
+def logout(request: Request, everywhere: bool = False):
+    if everywhere and request.session.get("user"):
+        revoke_user_sessions(request.session["user"])
     request.session.clear()
     return RedirectResponse(url="/login")
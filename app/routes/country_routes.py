@@ -1,6 +1,5 @@
 from fastapi import APIRouter, Depends, Request, Form, status
 from fastapi.responses import RedirectResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 from fastapi.responses import HTMLResponse
 from starlette.exceptions import HTTPException as StarletteHTTPException
@@ -8,18 +7,19 @@ from fastapi import FastAPI, Request, Depends, HTTPException, Form
 
 # ================================================
 from app.schemas.country import CountryCreate, CountryUpdate
-from app.db.database import get_db
+from app.db.database import get_async_db
 from app.db.models.country import Country
 from app.crud import users
-from app.crud.countries import (get_country,get_countries,get_country_by_cca2,create_country,get_countries_by_region,
-                                get_countries_by_language,search_countries,update_country,delete_country
-                                )
+from app.crud.countries_async import (AnySession,get_countries,get_country_by_cca2,create_country,get_countries_by_region,
+                                      get_countries_by_language,update_country,delete_country,get_facets,get_search_index,
+                                      get_snapshot,get_neighbors
+                                      )
 from app.core.security import verify_password
 from app.core.security import get_current_user_session
+from app.core.templates import templates, fragments
 
 
 country_router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
 
 
 @country_router.get("/", response_class=HTMLResponse)
@@ -28,40 +28,36 @@ async def list_countries(
     q: str = None,
     region: str = None,
     language: str = None,
-    db: Session = Depends(get_db),
+    db: AnySession = Depends(get_async_db),
     user: str = Depends(get_current_user_session)
 ):
-    # Get all distinct regions for dropdown
-    all_regions = db.query(Country.region).distinct().all()
-    all_regions = [r[0] for r in all_regions if r[0]]  # Flatten and remove None
-    
-    # Get all unique languages for dropdown
-    # This is simplified - you might need a more sophisticated approach
-    all_languages = set()
-    countries = db.query(Country.languages).all()
-    for c in countries:
-        if c.languages:
-            all_languages.update(c.languages.values())
-    all_languages = sorted(all_languages)
-    
-    # Apply filters
-    if q:
-        countries = search_countries(db, name=q)
-    elif region:
-        countries = get_countries_by_region(db, region=region)
-    elif language:
-        countries = get_countries_by_language(db, language_code=language)
-    else:
-        countries = get_countries(db)
-    
+    # Region / language dropdowns come from the precomputed facet cache
+    facets = await get_facets(db)
+
+    # The table is rendered once per dataset version and filter combination
+    filters = (q, region, language)
+    version = fragments.version()
+    country_table = fragments.get("country_table.html", filters, version)
+    if country_table is None:
+        # Apply filters
+        if q:
+            countries = (await get_search_index(db)).search(q)
+        elif region:
+            countries = await get_countries_by_region(db, region=region)
+        elif language:
+            countries = await get_countries_by_language(db, language_code=language)
+        else:
+            countries = await get_countries(db)
+        country_table = fragments.render("country_table.html", filters, version, countries=countries)
+
     return templates.TemplateResponse(
         "countries.html",
         {
             "request": request,
-            "countries": countries,
+            "country_table": country_table,
             "query": q,
-            "all_regions": all_regions,
-            "all_languages": all_languages,
+            "all_regions": facets.regions,
+            "all_languages": facets.languages,
             "selected_region": region,
             "selected_language": language,
             "current_user": user
@@ -74,17 +70,22 @@ async def list_countries(
 async def country_detail(
     request: Request,
     cca2: str,
-    db: Session = Depends(get_db),
+    db: AnySession = Depends(get_async_db),
     user: str = Depends(get_current_user_session)
 ):
-    country = get_country_by_cca2(db, cca2=cca2)
+    country = (await get_snapshot(db)).get(cca2)
     if not country:
         raise HTTPException(status_code=404)
     
-    same_region = get_countries_by_region(db, region=country.region)
+    # Shared by every country of the region until the next write
+    version = fragments.version()
+    same_region_block = fragments.get("country_same_region.html", country.region, version)
+    if same_region_block is None:
+        same_region = (await get_neighbors(db)).peers(cca2, scope="region")
+        same_region_block = fragments.render("country_same_region.html", country.region, version, same_region=same_region)
     return templates.TemplateResponse(
         "country_detail.html",
-        {"request": request, "country": country, "same_region": same_region,
+        {"request": request, "country": country, "same_region_block": same_region_block,
          "current_user": user}
     )
 
@@ -106,7 +107,7 @@ async def create_country_from_form(
     name_official: str = Form(...),
     cca2: str = Form(...),
     capital: str = Form(None),
-    db: Session = Depends(get_db),
+    db: AnySession = Depends(get_async_db),
     user: str = Depends(get_current_user_session)
 ):
     country_data = {
@@ -118,16 +119,16 @@ async def create_country_from_form(
         "population": 0,
         "flag_url": f"https://flagcdn.com/{cca2.lower()}.svg" or None
     }
-    create_country(db, CountryCreate(**country_data))
+    await create_country(db, CountryCreate(**country_data))
     return RedirectResponse("/", status_code=303)
 
 # Edit country routes
 @country_router.get("/countries/{cca2}/edit", response_class=HTMLResponse)
 async def edit_country_page(request: Request,
                              cca2: str, 
-                            db: Session = Depends(get_db),
+                            db: AnySession = Depends(get_async_db),
                             user: str = Depends(get_current_user_session)):
-    country = get_country_by_cca2(db, cca2)
+    country = await get_country_by_cca2(db, cca2)
     if not country:
         raise HTTPException(status_code=404)
     return templates.TemplateResponse("country_edit.html",
@@ -143,7 +144,7 @@ async def update_country_web(
     name_official: str = Form(...),
     capital: str = Form(None),
     population: int = Form(0),
-    db: Session = Depends(get_db),
+    db: AnySession = Depends(get_async_db),
     user: str = Depends(get_current_user_session)
 ):
     update_data = {
@@ -152,7 +153,7 @@ async def update_country_web(
         "capital": capital,
         "population": population
     }
-    update_country(db, cca2, CountryUpdate(**update_data))
+    await update_country(db, cca2, CountryUpdate(**update_data))
     return RedirectResponse(f"/countries/{cca2}", status_code=status.HTTP_303_SEE_OTHER)
 
 # Delete country route
@@ -160,9 +161,9 @@ async def update_country_web(
 async def delete_country_web(
     request: Request,
     cca2: str,
-    db: Session = Depends(get_db),
+    db: AnySession = Depends(get_async_db),
     user: str = Depends(get_current_user_session)
 ):
-    delete_country(db, cca2)
+    await delete_country(db, cca2)
     return RedirectResponse("/", status_code=status.HTTP_303_SEE_OTHER)
 
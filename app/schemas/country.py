@@ -1,4 +1,5 @@
 # # app/schemas/country.py
+from datetime import datetime
 from pydantic import BaseModel
 from typing import Optional, List, Dict
 
@@ -37,6 +38,14 @@ class Country(CountryBase):
     class Config:
         from_attributes = True
 
+class CountrySummary(BaseModel):
+    name_common: str
+    cca2: str
+    flag_url: Optional[str]
+
+    class Config:
+        from_attributes = True
+
 class CountryUpdate(BaseModel):
     name_common: Optional[str] = None
     name_official: Optional[str] = None
@@ -51,3 +60,50 @@ class CountryUpdate(BaseModel):
     timezones: Optional[List[str]] = None
     languages: Optional[dict] = None
 
+class CountryBulkUpdate(CountryUpdate):
+    cca2: str
+
+class BulkItemResult(BaseModel):
+    cca2: str
+    status: str  # created / updated / deleted / error
+    detail: Optional[str] = None
+
+class AggregateStats(BaseModel):
+    countries: int
+    population: int
+    area: float
+    density: Optional[float]
+    population_min: Optional[int]
+    population_max: Optional[int]
+    population_p50: Optional[int]
+    population_p90: Optional[int]
+    population_p99: Optional[int]
+
+class CountryStats(AggregateStats):
+    total_countries: int
+    total_regions: int
+    total_subregions: int
+    total_languages: int
+    regions: Dict[str, AggregateStats]
+    subregions: Dict[str, AggregateStats]
+    languages: Dict[str, AggregateStats]
+
+class QueryGroup(BaseModel):
+    key: Optional[str]
+    count: int
+    population: int
+    area: float
+
+class CountryChange(BaseModel):
+    version: int
+    operation: str  # create / update / delete
+    country_id: int
+    cca2: str
+    changed_fields: Optional[List[str]] = None
+    data: Optional[dict] = None  # the country after the write; None for deletes
+    changed_at: datetime
+
+class CountryChangeFeed(BaseModel):
+    version: int  # pass back as ?since= to continue from here
+    has_more: bool
+    changes: List[CountryChange]
@@ -0,0 +1,101 @@
+# app/services/change_feed.py
+"""
+Incremental sync over the ``country_changes`` log.
+
+Every committed write appends rows to the log in its own transaction (see
+app.crud.countries.commit_changes). The log id is a monotonic version, so
+a mirror that remembers the last version it applied only ever fetches the
+rows after it. ``/countries_api/changes`` returns them as JSON pages or, for
+``text/event-stream`` clients, as Server-Sent Events. An open stream sleeps
+until this process publishes a write. It also re-reads the log every
+CHANGES_STREAM_HEARTBEAT_SECONDS to pick up writes made by other
+processes (ingest, other workers).
+"""
+import asyncio
+import threading
+from contextlib import contextmanager
+from typing import AsyncIterator, List, Set, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.crud.countries import get_changes
+from app.db.database import SessionLocal
+from app.db.models.country_change import CountryChange
+from app.services import country_events
+from app.services.country_snapshot import dumps
+
+
+def change_payload(change: CountryChange) -> dict:
+    return {
+        "version": change.id,
+        "operation": change.operation,
+        "country_id": change.country_id,
+        "cca2": change.cca2,
+        "changed_fields": change.changed_fields,
+        "data": change.data,
+        "changed_at": change.changed_at.isoformat(),
+    }
+
+
+def read_changes(since: int, limit: int) -> List[dict]:
+    """Up to ``limit`` changes after version ``since``, oldest first, on a session of its own."""
+    db = SessionLocal()
+    try:
+        return [change_payload(change) for change in get_changes(db, since=since, limit=limit)]
+    finally:
+        db.close()
+
+
+def format_event(change: dict) -> bytes:
+    # The id comes back as Last-Event-ID when the client reconnects
+    return b"id: %d\nevent: change\ndata: %s\n\n" % (change["version"], dumps(change))
+
+
+class ChangeNotifier:
+    """Wakes waiting event streams, on any event loop, when a write is published."""
+
+    def __init__(self):
+        self._waiters: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+        self._lock = threading.Lock()
+
+    def __call__(self, old, new):
+        with self._lock:
+            waiters = list(self._waiters)
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:  # loop already closed
+                pass
+
+    @contextmanager
+    def listen(self):
+        """An asyncio.Event that is set by every write while the block runs."""
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._waiters.add(waiter)
+        try:
+            yield waiter[1]
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
+
+
+notifier = country_events.subscribe(ChangeNotifier())
+
+
+async def stream_changes(since: int, page_size: int, heartbeat: float) -> AsyncIterator[bytes]:
+    """Server-Sent Events for every change after ``since``, until the client disconnects."""
+    with notifier.listen() as wake:
+        while True:
+            # Cleared before reading, so a write committed meanwhile is not missed
+            wake.clear()
+            changes = await run_in_threadpool(read_changes, since, page_size)
+            for change in changes:
+                since = change["version"]
+                yield format_event(change)
+            if len(changes) == page_size:
+                continue
+            try:
+                await asyncio.wait_for(wake.wait(), heartbeat)
+            except asyncio.TimeoutError:
+                yield b": keep-alive\n\n"
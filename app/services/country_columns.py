@@ -0,0 +1,274 @@
+# app/services/country_columns.py
+"""
+Columnar, array-backed view of the country snapshot for analytical queries.
+
+Numeric columns live in ``array`` buffers (one machine word per row instead
+of a boxed attribute on every record). Region and subregion are
+dictionary-encoded, and every filterable value (region, subregion, language,
+timezone, UN membership, independence) has an inverted bitset held as a
+Python int. A filter is therefore a handful of big-int ANDs. Range filters
+bisect a per-column sort order. Ordered results either walk that
+precomputed order, stopping after the requested page, or sort only the
+matching rows, whichever touches fewer rows.
+
+Like the search index, the store follows the snapshot: it is rebuilt the
+first time it is asked for after a write.
+"""
+import math
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import chain
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.services.country_snapshot import CountryRecord, CountrySnapshot, get_snapshot
+
+NUMERIC_COLUMNS = ("population", "area", "density")
+ORDERABLE_COLUMNS = ("id",) + NUMERIC_COLUMNS
+GROUPABLE_COLUMNS = ("region", "subregion")
+
+NULL_INT = -(2 ** 63)
+
+# Bit positions set in each byte value, for turning a bitset back into rows
+_BITS = tuple(tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256))
+
+
+def bitset(rows, size: int) -> int:
+    bits = bytearray((size + 7) // 8)
+    for row in rows:
+        bits[row >> 3] |= 1 << (row & 7)
+    return int.from_bytes(bits, "little")
+
+
+def bitset_rows(mask: int) -> List[int]:
+    """Row numbers set in ``mask``, ascending."""
+    rows: List[int] = []
+    for index, byte in enumerate(mask.to_bytes((mask.bit_length() + 7) // 8, "little")):
+        if byte:
+            base = index << 3
+            rows.extend(base + bit for bit in _BITS[byte])
+    return rows
+
+
+def _encode(values) -> Tuple[List[Optional[str]], array, Dict[str, int]]:
+    """Dictionary-encode ``values``; code 0 is reserved for NULL/empty."""
+    names: List[Optional[str]] = [None]
+    lookup: Dict[str, int] = {}
+    codes = array("I")
+    for value in values:
+        if not value:
+            codes.append(0)
+            continue
+        code = lookup.get(value)
+        if code is None:
+            code = lookup[value] = len(names)
+            names.append(value)
+        codes.append(code)
+    return names, codes, lookup
+
+
+def _masks(keyed_rows: Mapping[str, List[int]], size: int) -> Dict[str, int]:
+    return {key: bitset(rows, size) for key, rows in keyed_rows.items()}
+
+
+class CountryColumns:
+    def __init__(self, records):
+        self.records: Tuple[CountryRecord, ...] = tuple(records)
+        size = self.size = len(self.records)
+        self.all_rows = (1 << size) - 1
+
+        self.ids = array("q", (r.id for r in self.records))
+        self.population = array("q", (NULL_INT if r.population is None else r.population for r in self.records))
+        self.area = array("d", (math.nan if r.area is None else r.area for r in self.records))
+        self.density = array("d", (
+            r.population / r.area if r.population is not None and r.area else math.nan
+            for r in self.records
+        ))
+
+        self.region_names, self.region_codes, _ = _encode(r.region for r in self.records)
+        self.subregion_names, self.subregion_codes, _ = _encode(r.subregion for r in self.records)
+
+        rows: Dict[str, Dict[str, List[int]]] = {
+            "region": {}, "subregion": {}, "language_code": {}, "language_name": {}, "timezone": {},
+        }
+        member, independent = [], []
+        for row, record in enumerate(self.records):
+            if record.region:
+                rows["region"].setdefault(record.region, []).append(row)
+            if record.subregion:
+                rows["subregion"].setdefault(record.subregion, []).append(row)
+            for code, name in (record.languages or {}).items():
+                rows["language_code"].setdefault(code.lower(), []).append(row)
+                if name:
+                    rows["language_name"].setdefault(name.casefold(), []).append(row)
+            for timezone in record.timezones or ():
+                rows["timezone"].setdefault(timezone, []).append(row)
+            if record.un_member:
+                member.append(row)
+            if record.independent:
+                independent.append(row)
+        self.masks = {column: _masks(keyed, size) for column, keyed in rows.items()}
+        self.un_member_mask = bitset(member, size)
+        self.independent_mask = bitset(independent, size)
+
+        self._orders: Dict[str, Tuple[array, list, int]] = {}
+        self._lock = threading.Lock()
+
+    # ---- columns ----------------------------------------------------------
+
+    def _is_null(self, column: str, row: int) -> bool:
+        value = getattr(self, column)[row]
+        return value == NULL_INT if column == "population" else math.isnan(value)
+
+    def order(self, column: str) -> Tuple[array, list, int]:
+        """
+        Rows ordered by ``column`` ascending (NULLs last, id breaking ties),
+        the sorted non-NULL values for bisecting, and how many there are.
+        """
+        cached = self._orders.get(column)
+        if cached is None:
+            values = getattr(self, column)
+            present = [row for row in range(self.size) if not self._is_null(column, row)]
+            present.sort(key=values.__getitem__)  # stable, and rows are in id order
+            nulls = [row for row in range(self.size) if self._is_null(column, row)]
+            cached = (array("I", present + nulls), [values[row] for row in present], len(present))
+            with self._lock:
+                self._orders[column] = cached
+        return cached
+
+    # ---- filter -----------------------------------------------------------
+
+    def range_mask(self, column: str, low=None, high=None) -> int:
+        """Rows whose ``column`` lies in [low, high]; NULLs never match."""
+        order, values, present = self.order(column)
+        start = 0 if low is None else bisect_left(values, low)
+        end = present if high is None else bisect_right(values, high)
+        if start >= end:
+            return 0
+        return bitset(order[start:end], self.size)
+
+    def select(
+        self,
+        region: Optional[str] = None,
+        subregion: Optional[str] = None,
+        language: Optional[str] = None,
+        timezone: Optional[str] = None,
+        un_member: Optional[bool] = None,
+        independent: Optional[bool] = None,
+        ranges: Optional[Mapping[str, Tuple[Optional[float], Optional[float]]]] = None,
+    ) -> int:
+        """Bitset of the rows matching every given filter."""
+        mask = self.all_rows
+        if region is not None:
+            mask &= self.masks["region"].get(region, 0)
+        if subregion is not None:
+            mask &= self.masks["subregion"].get(subregion, 0)
+        if language is not None:
+            # Same split as CountrySnapshot.speaking: short values are codes
+            if len(language) <= 3:
+                mask &= self.masks["language_code"].get(language.lower(), 0)
+            else:
+                mask &= self.masks["language_name"].get(language.casefold(), 0)
+        if timezone is not None:
+            mask &= self.masks["timezone"].get(timezone, 0)
+        if un_member is not None:
+            mask &= self.un_member_mask if un_member else ~self.un_member_mask
+        if independent is not None:
+            mask &= self.independent_mask if independent else ~self.independent_mask
+        for column, (low, high) in (ranges or {}).items():
+            if mask and (low is not None or high is not None):
+                mask &= self.range_mask(column, low, high)
+        return mask & self.all_rows
+
+    # ---- sort -------------------------------------------------------------
+
+    def rows(
+        self,
+        mask: int,
+        order_by: str = "id",
+        descending: bool = False,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> List[int]:
+        """
+        One page of the rows in ``mask``, ordered by ``order_by`` (NULLs last,
+        ties broken by id in the same direction), identically on every path.
+        """
+        stop = None if limit is None else offset + limit
+        if order_by == "id":
+            rows = bitset_rows(mask)
+            if descending:
+                rows.reverse()
+            return rows[offset:stop]
+
+        matched = mask.bit_count()
+        if stop is not None and stop * 8 < matched or matched * 4 > self.size:
+            # Dense selection or short page: walk the precomputed order
+            order, _, present = self.order(order_by)
+            walk = order if not descending else chain(reversed(order[:present]), order[present:])
+            bits = mask.to_bytes((self.size + 7) // 8, "little")
+            page: List[int] = []
+            wanted = matched if stop is None else min(stop, matched)
+            for row in walk:
+                if bits[row >> 3] >> (row & 7) & 1:
+                    page.append(row)
+                    if len(page) >= wanted:
+                        break
+            return page[offset:]
+
+        # Sparse selection: sort just the matching rows. Rows are in id order,
+        # so (value, row) breaks ties by id the same way as the walk above,
+        # descending included
+        values = getattr(self, order_by)
+        present, nulls = [], []
+        for row in bitset_rows(mask):
+            (nulls if self._is_null(order_by, row) else present).append(row)
+        present.sort(key=lambda row: (values[row], row), reverse=descending)
+        return (present + nulls)[offset:stop]
+
+    def records_for(self, rows: List[int]) -> List[CountryRecord]:
+        return [self.records[row] for row in rows]
+
+    # ---- group by ---------------------------------------------------------
+
+    def group_by(self, mask: int, column: str) -> List[dict]:
+        """Count, population and area of the rows in ``mask`` per region or subregion."""
+        names = getattr(self, f"{column}_names")
+        codes = getattr(self, f"{column}_codes")
+        count = [0] * len(names)
+        population = [0] * len(names)
+        area = [0.0] * len(names)
+        for row in bitset_rows(mask):
+            code = codes[row]
+            count[code] += 1
+            if self.population[row] != NULL_INT:
+                population[code] += self.population[row]
+            if not math.isnan(self.area[row]):
+                area[code] += self.area[row]
+        groups = [
+            {"key": names[code], "count": count[code], "population": population[code], "area": area[code]}
+            for code in range(len(names)) if count[code]
+        ]
+        groups.sort(key=lambda group: (-group["count"], group["key"] or ""))
+        return groups
+
+
+_columns: Optional[CountryColumns] = None
+_columns_snapshot: Optional[CountrySnapshot] = None
+_lock = threading.Lock()
+
+
+def columns_for(snapshot: CountrySnapshot) -> CountryColumns:
+    """Return the columnar store for ``snapshot``, rebuilding it after writes."""
+    global _columns, _columns_snapshot
+    with _lock:
+        if _columns_snapshot is not snapshot:
+            _columns = CountryColumns(snapshot.records)
+            _columns_snapshot = snapshot
+        return _columns
+
+
+def get_columns(db: Session) -> CountryColumns:
+    return columns_for(get_snapshot(db))
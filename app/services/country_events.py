@@ -0,0 +1,43 @@
+# app/services/country_events.py
+"""
+Tiny in-process change feed for country writes.
+
+The CRUD write paths publish ``(old, new)`` record pairs after a successful
+commit; caches subscribe to keep themselves in sync without re-querying.
+``old`` is ``None`` for a create and ``new`` is ``None`` for a delete.
+Readers that key caches on ``current_version()`` must read it before the
+data they cache.
+"""
+import threading
+from typing import Callable, List
+
+_listeners: List[Callable] = []
+_lock = threading.Lock()
+_version = 0
+
+
+def subscribe(listener: Callable):
+    _listeners.append(listener)
+    return listener
+
+
+def current_version() -> int:
+    return _version
+
+
+def publish(old, new):
+    global _version
+    # The version moves only once every cache has applied the change, so a
+    # reader that takes the version before reading data never files new-version
+    # entries built from old data
+    with _lock:
+        for listener in _listeners:
+            listener(old, new)
+        _version += 1
+
+
+def bump():
+    """Move the version without a record change, e.g. after a reload from the database."""
+    global _version
+    with _lock:
+        _version += 1
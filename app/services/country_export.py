@@ -0,0 +1,282 @@
+# app/services/country_export.py
+"""
+Full-dataset exports as JSON Lines, CSV or Parquet.
+
+An export is produced straight from a server-side cursor, one batch of rows
+at a time, so the table is never materialized as ORM objects. While the
+first download of a dataset version streams out, its bytes are also kept.
+Once complete, they become that version's artifact. Later downloads are
+served from the artifact as static bytes, with Range support and
+precompressed variants built once per encoding.
+"""
+import csv
+import importlib.util
+import io
+import threading
+import zlib
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from app.core.compression import ENCODERS
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.db.models.country import Country
+from app.services import country_events
+from app.services.country_snapshot import RECORD_FIELDS, dumps
+
+# pyarrow is optional and slow to import; it is only loaded by the first Parquet export
+HAVE_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional
+    zstandard = None
+
+EXPORT_COLUMNS = tuple(getattr(Country, name) for name in RECORD_FIELDS)
+
+
+@dataclass(frozen=True)
+class ExportFormat:
+    name: str
+    media_type: str
+    extension: str
+    encode: Callable[[Iterator[List[dict]]], Iterator[bytes]]
+    # Parquet compresses its own pages; transport compression gains nothing
+    compressible: bool = True
+
+
+def encode_jsonl(batches):
+    for rows in batches:
+        yield b"".join(dumps(row) + b"\n" for row in rows)
+
+
+def encode_csv(batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(RECORD_FIELDS)
+    for rows in batches:
+        for row in rows:
+            # Lists and mappings are written as JSON text
+            writer.writerow([
+                dumps(value).decode("utf-8") if isinstance(value, (list, dict)) else value
+                for value in row.values()
+            ])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands out what was written since the last drain."""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def parquet_schema():
+    import pyarrow
+
+    return pyarrow.schema([
+        ("id", pyarrow.int64()),
+        ("name_common", pyarrow.string()),
+        ("name_official", pyarrow.string()),
+        ("cca2", pyarrow.string()),
+        ("cca3", pyarrow.string()),
+        ("independent", pyarrow.bool_()),
+        ("un_member", pyarrow.bool_()),
+        ("region", pyarrow.string()),
+        ("subregion", pyarrow.string()),
+        ("area", pyarrow.float64()),
+        ("population", pyarrow.int64()),
+        ("flag_url", pyarrow.string()),
+        ("capital", pyarrow.string()),
+        ("timezones", pyarrow.list_(pyarrow.string())),
+        ("languages", pyarrow.map_(pyarrow.string(), pyarrow.string())),
+    ])
+
+
+def encode_parquet(batches):
+    import pyarrow
+    import pyarrow.parquet
+
+    schema = parquet_schema()
+    sink = _ChunkSink()
+    # One row group per cursor batch, flushed to the client as it is written
+    with pyarrow.parquet.ParquetWriter(sink, schema) as writer:
+        for rows in batches:
+            for row in rows:
+                if row["languages"] is not None:
+                    row["languages"] = list(row["languages"].items())
+            writer.write_table(pyarrow.Table.from_pylist(rows, schema=schema))
+            yield sink.drain()
+    yield sink.drain()
+
+
+FORMATS: Dict[str, ExportFormat] = {
+    "jsonl": ExportFormat("jsonl", "application/x-ndjson", "jsonl", encode_jsonl),
+    "csv": ExportFormat("csv", "text/csv; charset=utf-8", "csv", encode_csv),
+}
+if HAVE_PYARROW:
+    FORMATS["parquet"] = ExportFormat(
+        "parquet", "application/vnd.apache.parquet", "parquet", encode_parquet, compressible=False,
+    )
+
+
+def iter_country_rows(batch_size: int = 1000) -> Iterator[List[dict]]:
+    """Country rows as plain dicts, ``batch_size`` at a time, from a server-side cursor."""
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            select(*EXPORT_COLUMNS)
+            .order_by(Country.id)
+            .execution_options(stream_results=True, yield_per=batch_size)
+        )
+        for partition in result.partitions():
+            yield [row._asdict() for row in partition]
+    finally:
+        db.close()
+
+
+# ---- Streaming transport compression -----------------------------------
+
+def stream_encoder(encoding: str):
+    """(compress, flush) callables for incrementally encoding a body."""
+    if encoding == "gzip":
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        return compressor.compress, compressor.flush
+    if encoding == "br" and brotli is not None:
+        compressor = brotli.Compressor(quality=5)
+        return compressor.process, compressor.finish
+    if encoding == "zstd" and zstandard is not None:
+        compressor = zstandard.ZstdCompressor(level=6).compressobj()
+        return compressor.compress, compressor.flush
+    raise ValueError(f"Unsupported encoding '{encoding}'")
+
+
+# ---- Artifacts ----------------------------------------------------------
+
+@dataclass
+class ExportArtifact:
+    format: ExportFormat
+    version: int
+    body: bytes
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+
+    def variant(self, encoding: Optional[str]) -> bytes:
+        """The artifact's bytes, compressed with ``encoding`` once and then reused."""
+        if encoding is None:
+            return self.body
+        data = self.encoded.get(encoding)
+        if data is None:
+            data = self.encoded[encoding] = ENCODERS[encoding](self.body)
+        return data
+
+
+class ExportCache:
+    """The current version's artifact per format; artifacts over ``max_bytes`` are not kept."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._artifacts: Dict[str, ExportArtifact] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str, version: int) -> Optional[ExportArtifact]:
+        with self._lock:
+            artifact = self._artifacts.get(name)
+        return artifact if artifact is not None and artifact.version == version else None
+
+    def put(self, artifact: ExportArtifact):
+        with self._lock:
+            self._artifacts[artifact.format.name] = artifact
+
+    def stream(
+        self, export_format: ExportFormat, encoding: Optional[str], batch_size: int, version: int
+    ) -> Iterator[bytes]:
+        """
+        Produce an export from the database, encoded on the fly, and keep the
+        raw bytes as ``version``'s artifact if no write happened meanwhile.
+        ``version`` is read by the caller before anything else, so the
+        response's ETag and the artifact agree.
+        """
+        compress, flush = stream_encoder(encoding) if encoding else (None, None)
+        # Raw and (when encoding) encoded chunks, until they outgrow max_bytes
+        kept: Optional[List[bytes]] = []
+        kept_encoded: List[bytes] = []
+        size = 0
+        for chunk in export_format.encode(iter_country_rows(batch_size)):
+            if not chunk:
+                continue
+            data = compress(chunk) if compress else chunk
+            if kept is not None:
+                kept.append(chunk)
+                if compress:
+                    kept_encoded.append(data)
+                size += len(chunk) + (len(data) if compress else 0)
+                if size > self.max_bytes:
+                    kept = None
+                    kept_encoded.clear()
+            if data:
+                yield data
+        if flush:
+            data = flush()
+            kept_encoded.append(data)
+            yield data
+        if kept is not None and country_events.current_version() == version:
+            artifact = ExportArtifact(export_format, version, b"".join(kept))
+            if encoding:
+                # Keep exactly the bytes just sent, so a resumed (Range)
+                # download continues the same representation
+                artifact.encoded[encoding] = b"".join(kept_encoded)
+            self.put(artifact)
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    The (start, end) byte span, end inclusive, of a single-range
+    ``Range: bytes=...`` header. Returns None when the header is absent or
+    not a single byte range, in which case the full body is sent. Raises
+    ValueError when the range cannot be satisfied.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            start, end = max(size - int(last), 0), size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise ValueError("Range not satisfiable")
+    return start, min(end, size - 1)
+
+
+export_cache = ExportCache(max_bytes=settings.EXPORT_CACHE_MAX_BYTES)
@@ -0,0 +1,47 @@
+# app/services/country_facets.py
+"""
+Region and language facets (with per-facet country counts) for the web index
+page. Computed from the country snapshot and kept until the snapshot is
+replaced (after a write or a reload), like the search index.
+"""
+import threading
+from collections import Counter
+from typing import List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.services.country_snapshot import CountrySnapshot, get_snapshot
+
+
+class CountryFacets:
+    def __init__(self, records=()):
+        regions: Counter = Counter()
+        languages: Counter = Counter()
+        for record in records:
+            if record.region:
+                regions[record.region] += 1
+            for name in set((record.languages or {}).values()):
+                if name:
+                    languages[name] += 1
+        self.regions: List[Tuple[str, int]] = sorted(regions.items())
+        self.languages: List[Tuple[str, int]] = sorted(languages.items())
+
+
+_facets: Optional[CountryFacets] = None
+_facets_snapshot: Optional[CountrySnapshot] = None
+_lock = threading.Lock()
+
+
+def facets_for(snapshot: CountrySnapshot) -> CountryFacets:
+    """Return the facets for ``snapshot``, recomputing them after writes."""
+    global _facets, _facets_snapshot
+    with _lock:
+        if _facets_snapshot is not snapshot:
+            _facets = CountryFacets(snapshot.records)
+            _facets_snapshot = snapshot
+        return _facets
+
+
+def get_facets(db: Session) -> CountryFacets:
+    return facets_for(get_snapshot(db))
+
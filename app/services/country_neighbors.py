@@ -0,0 +1,72 @@
+# app/services/country_neighbors.py
+"""
+Precomputed region / subregion peer lists for the country detail page and the
+same-region API. Peers are held as light (name, cca2, flag) summaries,
+grouped once per country snapshot and kept until the snapshot is replaced
+(after a write or a reload).
+"""
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.services.country_snapshot import CountrySnapshot, get_snapshot
+
+SCOPES = ("region", "subregion")
+
+
+@dataclass(frozen=True)
+class CountrySummaryRecord:
+    id: int
+    name_common: Optional[str]
+    cca2: Optional[str]
+    flag_url: Optional[str]
+
+    @classmethod
+    def from_record(cls, record) -> "CountrySummaryRecord":
+        return cls(record.id, record.name_common, record.cca2, record.flag_url)
+
+
+class CountryNeighbors:
+    def __init__(self, records=()):
+        # (scope, group name) -> {country id: summary}
+        members: Dict[Tuple[str, str], Dict[int, CountrySummaryRecord]] = {}
+        self._placement: Dict[str, Dict[str, Optional[str]]] = {}
+        for record in records:
+            if record.cca2:
+                self._placement[record.cca2] = {scope: getattr(record, scope) for scope in SCOPES}
+            for scope in SCOPES:
+                name = getattr(record, scope)
+                if name:
+                    members.setdefault((scope, name), {})[record.id] = CountrySummaryRecord.from_record(record)
+        self._groups: Dict[Tuple[str, str], Tuple[CountrySummaryRecord, ...]] = {
+            key: tuple(group[i] for i in sorted(group)) for key, group in members.items()
+        }
+
+    def peers(self, cca2: str, scope: str = "region", limit: Optional[int] = None):
+        """Summaries of every country sharing ``cca2``'s region (or subregion), itself included."""
+        placement = self._placement.get(cca2)
+        if placement is None or not placement[scope]:
+            return []
+        return list(self._groups.get((scope, placement[scope]), ())[:limit])
+
+
+_neighbors: Optional[CountryNeighbors] = None
+_neighbors_snapshot: Optional[CountrySnapshot] = None
+_lock = threading.Lock()
+
+
+def neighbors_for(snapshot: CountrySnapshot) -> CountryNeighbors:
+    """Return the peer groups for ``snapshot``, regrouping after writes."""
+    global _neighbors, _neighbors_snapshot
+    with _lock:
+        if _neighbors_snapshot is not snapshot:
+            _neighbors = CountryNeighbors(snapshot.records)
+            _neighbors_snapshot = snapshot
+        return _neighbors
+
+
+def get_neighbors(db: Session) -> CountryNeighbors:
+    return neighbors_for(get_snapshot(db))
+
@@ -0,0 +1,126 @@
+# app/services/country_search.py
+"""
+Ranked, typo-tolerant country search over an in-memory trigram index.
+
+Indexes common and official names, capital and the cca2/cca3 codes of every
+country in the snapshot. Exact code hits rank first, then exact, prefix,
+word-prefix and substring name matches; anything else is scored by trigram
+similarity so small typos ("Germny", "Frnace") still find their country.
+"""
+import threading
+import unicodedata
+from collections import defaultdict
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.services.country_snapshot import CountryRecord, CountrySnapshot, get_snapshot
+
+# (attribute, weight) of each free-text field
+TEXT_FIELDS = (("name_common", 3.0), ("name_official", 2.0), ("capital", 1.5))
+MIN_SIMILARITY = 0.35
+
+
+def normalize(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold().strip()
+
+
+def trigrams(word: str) -> set:
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+class CountrySearchIndex:
+    def __init__(self, records):
+        self.records: List[CountryRecord] = list(records)
+        self._codes = defaultdict(list)
+        self._postings = defaultdict(set)
+        # Per record: [(weight, normalized text, [(word, trigrams), ...]), ...]
+        self._fields = []
+        for position, record in enumerate(self.records):
+            for code in (record.cca2, record.cca3):
+                if code:
+                    self._codes[code.casefold()].append(position)
+            fields = []
+            for attribute, weight in TEXT_FIELDS:
+                value = getattr(record, attribute)
+                if not value:
+                    continue
+                text = normalize(value)
+                words = [(word, trigrams(word)) for word in text.split()]
+                for _, grams in words:
+                    for gram in grams:
+                        self._postings[gram].add(position)
+                fields.append((weight, text, words))
+            self._fields.append(fields)
+
+    def _score(self, position: int, query: str, query_grams: set) -> float:
+        best = 0.0
+        for weight, text, words in self._fields[position]:
+            if text == query:
+                score = 90
+            elif text.startswith(query):
+                score = 70
+            elif any(word.startswith(query) for word, _ in words):
+                score = 60
+            elif query in text:
+                score = 50
+            else:
+                sim = max((similarity(query_grams, grams) for _, grams in words), default=0.0)
+                sim = max(sim, similarity(query_grams, trigrams(text)))
+                score = 40 * sim if sim >= MIN_SIMILARITY else 0
+            best = max(best, score * weight)
+        return best
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[CountryRecord]:
+        query = normalize(query)
+        if not query:
+            return []
+        scores = {position: 1000.0 for position in self._codes.get(query, ())}
+
+        query_grams = trigrams(query) if " " not in query else {
+            gram for word in query.split() for gram in trigrams(word)
+        }
+        if len(query) < 3:
+            candidates = range(len(self.records))
+        else:
+            candidates = set()
+            for gram in query_grams:
+                candidates |= self._postings.get(gram, set())
+
+        for position in candidates:
+            score = self._score(position, query, query_grams)
+            if score > scores.get(position, 0):
+                scores[position] = score
+
+        ranked = sorted(
+            (position for position, score in scores.items() if score > 0),
+            key=lambda p: (-scores[p], self.records[p].name_common or ""),
+        )
+        return [self.records[p] for p in ranked[:limit]]
+
+
+_index: Optional[CountrySearchIndex] = None
+_indexed_snapshot: Optional[CountrySnapshot] = None
+_lock = threading.Lock()
+
+
+def search_index_for(snapshot: CountrySnapshot) -> CountrySearchIndex:
+    """Return the index for ``snapshot``, rebuilding it after writes."""
+    global _index, _indexed_snapshot
+    with _lock:
+        if _indexed_snapshot is not snapshot:
+            _index = CountrySearchIndex(snapshot.records)
+            _indexed_snapshot = snapshot
+        return _index
+
+
+def get_search_index(db: Session) -> CountrySearchIndex:
+    return search_index_for(get_snapshot(db))
@@ -0,0 +1,399 @@
+# app/services/country_snapshot.py
+"""
+Read-through, immutable in-process snapshot of the ``countries`` table.
+
+The table is small and rarely written, so reads are served from a snapshot
+built once from the database and indexed by cca2, cca3, region, subregion and
+language. Writes never mutate a snapshot: the CRUD layer publishes the change
+and a new snapshot is derived from the previous one without touching the DB.
+Writes made by other processes (ingest, backfills, other workers) are picked
+up by ``refresh()``, which rebuilds the snapshot when the change log has
+moved past what this process has applied.
+"""
+import base64
+import bisect
+import json
+import os
+import threading
+from dataclasses import dataclass, fields
+from types import MappingProxyType
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.db.models.country import Country
+from app.db.models.country_change import CountryChange
+from app.schemas.country import Country as CountrySchema
+from app.services import country_events
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+
+
+@dataclass(frozen=True)
+class CountryRecord:
+    id: int
+    name_common: Optional[str]
+    name_official: Optional[str]
+    cca2: Optional[str]
+    cca3: Optional[str]
+    independent: Optional[bool]
+    un_member: Optional[bool]
+    region: Optional[str]
+    subregion: Optional[str]
+    area: Optional[float]
+    population: Optional[int]
+    flag_url: Optional[str]
+    capital: Optional[str]
+    timezones: Optional[Tuple[str, ...]]
+    languages: Optional[Mapping[str, str]]
+
+    @classmethod
+    def from_model(cls, country: Country) -> "CountryRecord":
+        return cls.from_dict({f.name: getattr(country, f.name) for f in fields(cls)})
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "CountryRecord":
+        values = {f.name: data.get(f.name) for f in fields(cls)}
+        if values["timezones"] is not None:
+            values["timezones"] = tuple(values["timezones"])
+        if values["languages"] is not None:
+            values["languages"] = MappingProxyType(dict(values["languages"]))
+        return cls(**values)
+
+    def as_dict(self, only: Optional[Iterable[str]] = None) -> dict:
+        """Plain JSON-ready dict of the record, optionally limited to ``only`` fields."""
+        names = only if only is not None else RECORD_FIELDS
+        values = {name: getattr(self, name) for name in names}
+        if values.get("timezones") is not None:
+            values["timezones"] = list(values["timezones"])
+        if values.get("languages") is not None:
+            values["languages"] = dict(values["languages"])
+        return values
+
+
+RECORD_FIELDS = tuple(f.name for f in fields(CountryRecord))
+# Field order of the Country response model, so pre-serialized rows match it
+RESPONSE_FIELDS = tuple(CountrySchema.model_fields)
+
+
+def dumps(value) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def loads(data: bytes):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Sortable fields and the JSON types their cursor values may have
+SORT_VALUE_TYPES = {
+    "id": (int,),
+    "name_common": (str,),
+    "cca2": (str,),
+    "population": (int,),
+    "area": (int, float),
+}
+SORTABLE_FIELDS = tuple(SORT_VALUE_TYPES)
+
+
+def sort_key(record: CountryRecord, column: str) -> tuple:
+    # NULLs sort last; id breaks ties so every key is unique
+    value = getattr(record, column)
+    return (value is None, "" if value is None else value, record.id)
+
+
+def encode_cursor(column: str, key: tuple) -> str:
+    raw = json.dumps([column, *key], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, column: str) -> tuple:
+    """Decode an opaque cursor; raises ValueError if malformed or for another sort."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_column, is_null, value, record_id = json.loads(base64.urlsafe_b64decode(padded))
+    except Exception as exc:
+        raise ValueError("Malformed cursor") from exc
+    if cursor_column != column:
+        raise ValueError("Cursor was issued for a different sort order")
+    # Values must compare with the sort keys of this column (see sort_key)
+    expected = (str,) if is_null else SORT_VALUE_TYPES.get(column, ())
+    if (
+        not isinstance(is_null, bool)
+        or isinstance(value, bool) or not isinstance(value, expected)
+        or isinstance(record_id, bool) or not isinstance(record_id, int)
+    ):
+        raise ValueError("Malformed cursor")
+    return (is_null, value, record_id)
+
+
+def _group(records, key) -> Dict[str, Tuple[CountryRecord, ...]]:
+    groups: Dict[str, list] = {}
+    for record in records:
+        value = key(record)
+        if value:
+            groups.setdefault(value, []).append(record)
+    return {k: tuple(v) for k, v in groups.items()}
+
+
+class CountrySnapshot:
+    def __init__(self, records, json_cache: Optional[Dict[int, bytes]] = None):
+        self.records: Tuple[CountryRecord, ...] = tuple(sorted(records, key=lambda r: r.id))
+        self.by_cca2 = {r.cca2: r for r in self.records if r.cca2}
+        self.by_cca3 = {r.cca3: r for r in self.records if r.cca3}
+        self.by_region = _group(self.records, lambda r: r.region)
+        self.by_subregion = _group(self.records, lambda r: r.subregion)
+
+        by_code: Dict[str, list] = {}
+        by_name: Dict[str, list] = {}
+        for record in self.records:
+            for code, name in (record.languages or {}).items():
+                by_code.setdefault(code.lower(), []).append(record)
+                if name:
+                    by_name.setdefault(name.casefold(), []).append(record)
+        self.by_language_code = {k: tuple(v) for k, v in by_code.items()}
+        self.by_language_name = {k: tuple(v) for k, v in by_name.items()}
+        self._sorted: Dict[str, Tuple[Tuple[CountryRecord, ...], List[tuple]]] = {}
+        # Serialized rows by id; carried over to derived snapshots for unchanged rows
+        self._json: Dict[int, bytes] = dict(json_cache or {})
+
+    def page(self, skip: int = 0, limit: int = 100):
+        return list(self.records[skip:skip + limit])
+
+    def sorted_by(self, column: str) -> Tuple[Tuple[CountryRecord, ...], List[tuple]]:
+        """Records ordered by ``column`` (ascending) plus their sort keys, computed once."""
+        cache = self._sorted
+        if column not in cache:
+            records = tuple(sorted(self.records, key=lambda r: sort_key(r, column)))
+            cache[column] = (records, [sort_key(r, column) for r in records])
+        return cache[column]
+
+    def keyset_page(
+        self,
+        column: str = "id",
+        descending: bool = False,
+        after: Optional[tuple] = None,
+        limit: int = 100,
+        skip: int = 0,
+        predicate: Optional[Callable[[CountryRecord], bool]] = None,
+    ) -> Tuple[List[CountryRecord], Optional[tuple]]:
+        """
+        Return up to ``limit`` records that come after the ``after`` sort key,
+        and the key to resume from (None on the last page).
+        """
+        if limit <= 0:
+            return [], None
+        records, keys = self.sorted_by(column)
+        if descending:
+            start = bisect.bisect_left(keys, after) if after is not None else len(records)
+            candidates = (records[i] for i in range(start - 1, -1, -1))
+        else:
+            start = bisect.bisect_right(keys, after) if after is not None else 0
+            candidates = (records[i] for i in range(start, len(records)))
+
+        page = []
+        for record in candidates:
+            if predicate is not None and not predicate(record):
+                continue
+            if skip:
+                skip -= 1
+                continue
+            if len(page) == limit:
+                return page, sort_key(page[-1], column)
+            page.append(record)
+        return page, None
+
+    def get(self, cca2: str) -> Optional[CountryRecord]:
+        return self.by_cca2.get(cca2)
+
+    def in_region(self, region: str):
+        return list(self.by_region.get(region, ()))
+
+    def in_subregion(self, subregion: str):
+        return list(self.by_subregion.get(subregion, ()))
+
+    def speaking(self, language: str):
+        # Same split as crud.get_countries_by_language: short values are codes
+        if len(language) <= 3:
+            return list(self.by_language_code.get(language.lower(), ()))
+        return list(self.by_language_name.get(language.casefold(), ()))
+
+    def json_row(self, record: CountryRecord) -> bytes:
+        """``record`` serialized like the Country response model, cached per row."""
+        data = self._json.get(record.id)
+        if data is None:
+            data = self._json[record.id] = dumps(record.as_dict(RESPONSE_FIELDS))
+        return data
+
+    def json_array(self, records) -> bytes:
+        return b"[" + b",".join(map(self.json_row, records)) + b"]"
+
+    def replace(self, old: Optional[CountryRecord], new: Optional[CountryRecord]) -> "CountrySnapshot":
+        # Dropping new.id too keeps this idempotent when a rebuild already has the write
+        stale = {r.id for r in (old, new) if r is not None}
+        records = [r for r in self.records if r.id not in stale]
+        if new is not None:
+            records.append(new)
+        return CountrySnapshot(records, {k: v for k, v in self._json.items() if k not in stale})
+
+
+_snapshot: Optional[CountrySnapshot] = None
+_generation = 0
+# Change-log version the snapshot reflects (None until known), and ids this
+# process logged past it, already applied to the snapshot when published
+_change_version: Optional[int] = None
+_own_changes: Set[int] = set()
+_lock = threading.Lock()
+
+
+def build_snapshot(db: Session) -> CountrySnapshot:
+    return CountrySnapshot(CountryRecord.from_model(c) for c in db.query(Country).all())
+
+
+def get_snapshot(db: Session) -> CountrySnapshot:
+    """Return the current snapshot, building it from ``db`` on first use."""
+    global _snapshot, _change_version
+    snapshot = _snapshot
+    if snapshot is not None:
+        return snapshot
+    generation = _generation
+    # Read the version first: a write racing the build only makes it look older
+    version = change_version(db)
+    snapshot = build_snapshot(db)
+    with _lock:
+        # A write landed while we were reading; keep whatever it installed
+        if _generation == generation and _snapshot is None:
+            _snapshot = snapshot
+            _change_version = version
+    return _snapshot or snapshot
+
+
+def peek_snapshot() -> Optional[CountrySnapshot]:
+    """Return the current snapshot without building one."""
+    return _snapshot
+
+
+def record_changes(change_ids: Iterable[int]):
+    """Note change-log ids committed by this process, so ``refresh()`` doesn't rebuild for them."""
+    with _lock:
+        _own_changes.update(change_ids)
+
+
+def refresh(db: Session) -> bool:
+    """
+    Rebuild the snapshot when the change log holds writes from another
+    process. The derived caches are keyed on snapshot identity and follow the
+    new one, and the event version is bumped so ETags and version-keyed caches
+    move too. Returns True when a new snapshot was installed.
+    """
+    global _snapshot, _generation, _change_version, _own_changes
+    with _lock:
+        snapshot, generation, known, own = _snapshot, _generation, _change_version, set(_own_changes)
+    if snapshot is None or known is None:
+        return False
+    try:
+        ids = db.scalars(
+            select(CountryChange.id).where(CountryChange.id > known).order_by(CountryChange.id)
+        ).all()
+    except SQLAlchemyError:
+        db.rollback()
+        return False
+    if not ids:
+        return False
+    latest = ids[-1]
+    if own.issuperset(ids):
+        with _lock:
+            if _change_version == known:
+                _change_version = latest
+                _own_changes.difference_update(ids)
+        return False
+    rebuilt = build_snapshot(db)
+    with _lock:
+        if _generation != generation:
+            return False  # a local write raced the rebuild; look again next time
+        _snapshot = rebuilt
+        _generation += 1
+        _change_version = latest
+        _own_changes = {i for i in _own_changes if i > latest}
+    country_events.bump()
+    return True
+
+
+@country_events.subscribe
+def _apply_change(old, new):
+    global _snapshot, _generation
+    with _lock:
+        _generation += 1
+        if _snapshot is not None:
+            _snapshot = _snapshot.replace(old, new)
+
+
+# ---- Snapshot files -----------------------------------------------------
+# A snapshot saved together with the change-log version it reflects can be
+# restored at startup instead of reading the table, as long as the log has
+# not moved on since (any write, from any process, adds to the log).
+
+SNAPSHOT_FILE_FORMAT = 1
+
+
+def change_version(db: Session) -> Optional[int]:
+    """The latest change-log version, or None when the log table doesn't exist yet."""
+    try:
+        return db.scalar(select(func.coalesce(func.max(CountryChange.id), 0)))
+    except SQLAlchemyError:
+        db.rollback()
+        return None
+
+
+def save_snapshot(db: Session, path: str) -> bool:
+    version = change_version(db)
+    if version is None:
+        return False
+    # Read the version first: a write racing the build only makes the file look older
+    snapshot = get_snapshot(db)
+    payload = {
+        "format": SNAPSHOT_FILE_FORMAT,
+        "change_version": version,
+        "records": [record.as_dict() for record in snapshot.records],
+    }
+    partial = f"{path}.tmp"
+    with open(partial, "wb") as f:
+        f.write(dumps(payload))
+    os.replace(partial, path)
+    return True
+
+
+def restore_snapshot(db: Session, path: str) -> Optional[CountrySnapshot]:
+    """
+    Install the snapshot saved at ``path`` if it matches the current
+    change-log version. Returns None (and installs nothing) when the file is
+    missing, unreadable or stale.
+    """
+    global _snapshot, _change_version
+    generation = _generation
+    version = change_version(db)
+    try:
+        with open(path, "rb") as f:
+            payload = loads(f.read())
+    except (OSError, ValueError):
+        return None
+    if (
+        version is None
+        or payload.get("format") != SNAPSHOT_FILE_FORMAT
+        or payload.get("change_version") != version
+    ):
+        return None
+    snapshot = CountrySnapshot(CountryRecord.from_dict(values) for values in payload["records"])
+    with _lock:
+        if _generation == generation and _snapshot is None:
+            _snapshot = snapshot
+            _change_version = version
+    return _snapshot or snapshot
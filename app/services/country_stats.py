@@ -0,0 +1,110 @@
+# app/services/country_stats.py
+"""
+Aggregate country statistics (totals, population / area sums, density and
+population min / max / percentiles) overall and per region, subregion and
+language. Computed from the country snapshot and kept until the snapshot is
+replaced (after a write or a reload), so polling dashboards never trigger a
+database scan.
+"""
+import bisect
+import math
+import threading
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.services.country_snapshot import CountrySnapshot, get_snapshot
+
+PERCENTILES = (50, 90, 99)
+
+
+class Aggregate:
+    def __init__(self):
+        self.countries = 0
+        self.population = 0
+        self.area = 0.0
+        # Population of countries with a known area, for density
+        self.population_with_area = 0
+        self.populations = []  # sorted
+
+    def add(self, record):
+        population = record.population or 0
+        self.countries += 1
+        self.population += population
+        if record.area:
+            self.area += record.area
+            self.population_with_area += population
+        bisect.insort(self.populations, population)
+
+    def percentile(self, p: int) -> Optional[int]:
+        if not self.populations:
+            return None
+        rank = max(1, math.ceil(p / 100 * len(self.populations)))
+        return self.populations[rank - 1]
+
+    def as_dict(self) -> dict:
+        values = {
+            "countries": self.countries,
+            "population": self.population,
+            "area": round(self.area, 2),
+            "density": round(self.population_with_area / self.area, 2) if self.area > 0 else None,
+            "population_min": self.populations[0] if self.populations else None,
+            "population_max": self.populations[-1] if self.populations else None,
+        }
+        for p in PERCENTILES:
+            values[f"population_p{p}"] = self.percentile(p)
+        return values
+
+
+class CountryStats:
+    def __init__(self, records=()):
+        self.total = Aggregate()
+        self.groups: Dict[str, Dict[str, Aggregate]] = {"regions": {}, "subregions": {}, "languages": {}}
+        for record in records:
+            self._count(record)
+
+    def _keys(self, record):
+        if record.region:
+            yield "regions", record.region
+        if record.subregion:
+            yield "subregions", record.subregion
+        for code in {code.lower() for code in (record.languages or {})}:
+            yield "languages", code
+
+    def _count(self, record):
+        self.total.add(record)
+        for kind, key in self._keys(record):
+            self.groups[kind].setdefault(key, Aggregate()).add(record)
+
+    def as_dict(self) -> dict:
+        return {
+            **self.total.as_dict(),
+            "total_countries": self.total.countries,
+            "total_regions": len(self.groups["regions"]),
+            "total_subregions": len(self.groups["subregions"]),
+            "total_languages": len(self.groups["languages"]),
+            **{
+                kind: {key: aggregate.as_dict() for key, aggregate in sorted(groups.items())}
+                for kind, groups in self.groups.items()
+            },
+        }
+
+
+_stats: Optional[CountryStats] = None
+_stats_snapshot: Optional[CountrySnapshot] = None
+_lock = threading.Lock()
+
+
+def stats_for(snapshot: CountrySnapshot) -> dict:
+    """Return the statistics for ``snapshot``, recomputing them after writes."""
+    global _stats, _stats_snapshot
+    with _lock:
+        if _stats_snapshot is not snapshot:
+            _stats = CountryStats(snapshot.records)
+            _stats_snapshot = snapshot
+        return _stats.as_dict()
+
+
+def get_stats(db: Session) -> dict:
+    return stats_for(get_snapshot(db))
+
@@ -0,0 +1,104 @@
+# app/services/country_timezones.py
+"""
+Ordered in-memory index of countries by UTC offset.
+
+restcountries lists timezones as "UTC", "UTC+05:30", "UTC-03:00" and so on.
+Each one is parsed into minutes east of UTC and kept in a sorted list, so a
+single offset or an offset range is answered by bisection. The same parser
+fills the ``country_timezones`` table at ingest and on CRUD writes. Like the
+search index, the in-memory index is rebuilt on the first read after a
+write.
+"""
+import re
+import threading
+from bisect import bisect_left, bisect_right
+from typing import List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.services.country_snapshot import CountryRecord, CountrySnapshot, get_snapshot
+
+_OFFSET = re.compile(r"^(?:UTC|GMT)?\s*(?:([+\-−]?)\s*(\d{1,2})(?::?(\d{2}))?)?$", re.IGNORECASE)
+
+# Real-world offsets run from UTC-12:00 to UTC+14:00
+MIN_OFFSET = -12 * 60
+MAX_OFFSET = 14 * 60
+
+
+def parse_utc_offset(value: str) -> Optional[int]:
+    """
+    Minutes east of UTC for "UTC+05:30", "+05:30", "5", "-0330" or "UTC";
+    None for anything else (e.g. IANA names).
+    """
+    value = (value or "").strip()
+    match = _OFFSET.match(value) if value else None
+    if match is None:
+        return None
+    sign, hours, minutes = match.groups()
+    if hours is None:
+        return 0
+    if int(minutes or 0) >= 60:
+        return None
+    offset = int(hours) * 60 + int(minutes or 0)
+    if sign and sign in "-−":
+        offset = -offset
+    return offset if MIN_OFFSET <= offset <= MAX_OFFSET else None
+
+
+def format_utc_offset(offset: int) -> str:
+    if offset == 0:
+        return "UTC"
+    hours, minutes = divmod(abs(offset), 60)
+    return f"UTC{'-' if offset < 0 else '+'}{hours:02d}:{minutes:02d}"
+
+
+class CountryTimezoneIndex:
+    def __init__(self, records):
+        entries = []
+        for record in records:
+            offsets = {parse_utc_offset(name) for name in record.timezones or ()}
+            offsets.discard(None)
+            entries.extend((offset, record.id, record) for offset in offsets)
+        entries.sort(key=lambda entry: entry[:2])
+        self._keys: List[Tuple[int, int]] = [entry[:2] for entry in entries]
+        self._records: List[CountryRecord] = [entry[2] for entry in entries]
+
+    def between(self, start: int, end: int) -> List[CountryRecord]:
+        """
+        Countries with a timezone in [start, end] (minutes), ordered by their
+        smallest such offset and then id; each country appears once.
+        """
+        lo = bisect_left(self._keys, (start, -1))
+        hi = bisect_right(self._keys, (end, float("inf")))
+        seen = set()
+        found = []
+        for record in self._records[lo:hi]:
+            if record.id not in seen:
+                seen.add(record.id)
+                found.append(record)
+        return found
+
+    def at(self, offset: int) -> List[CountryRecord]:
+        return self.between(offset, offset)
+
+    def offsets(self) -> List[int]:
+        return sorted({offset for offset, _ in self._keys})
+
+
+_index: Optional[CountryTimezoneIndex] = None
+_indexed_snapshot: Optional[CountrySnapshot] = None
+_lock = threading.Lock()
+
+
+def timezone_index_for(snapshot: CountrySnapshot) -> CountryTimezoneIndex:
+    """Return the index for ``snapshot``, rebuilding it after writes."""
+    global _index, _indexed_snapshot
+    with _lock:
+        if _indexed_snapshot is not snapshot:
+            _index = CountryTimezoneIndex(snapshot.records)
+            _indexed_snapshot = snapshot
+        return _index
+
+
+def get_timezone_index(db: Session) -> CountryTimezoneIndex:
+    return timezone_index_for(get_snapshot(db))
@@ -0,0 +1,42 @@
+# scripts/backfill_country_languages.py
+"""
+One-off migration: create the country_languages table and (re)build it from
+the JSON ``languages`` column of every country. Safe to run more than once.
+"""
+import sys
+from pathlib import Path
+from sqlalchemy.orm import Session
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from app.db.database import SessionLocal, Base, engine
+from app.db.models.country import Country
+from app.db.models.country_language import CountryLanguage
+from app.crud.countries import language_entries
+
+def backfill_languages(db: Session):
+    db.query(CountryLanguage).delete(synchronize_session=False)
+    total = 0
+    for country in db.query(Country).all():
+        entries = language_entries(country.languages)
+        country.language_entries = entries
+        total += len(entries)
+    db.commit()
+    return total
+
+def main():
+    Base.metadata.create_all(bind=engine, tables=[CountryLanguage.__table__])
+
+    db = SessionLocal()
+    try:
+        total = backfill_languages(db)
+        print(f"Backfilled {total} country languages")
+    except Exception as e:
+        print(f"Error occurred: {e}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
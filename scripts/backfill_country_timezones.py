@@ -0,0 +1,42 @@
+# scripts/backfill_country_timezones.py
+"""
+One-off migration: create the country_timezones table and (re)build it from
+the JSON ``timezones`` column of every country. Safe to run more than once.
+"""
+import sys
+from pathlib import Path
+from sqlalchemy.orm import Session
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from app.db.database import SessionLocal, Base, engine
+from app.db.models.country import Country
+from app.db.models.country_timezone import CountryTimezone
+from app.crud.countries import timezone_entries
+
+def backfill_timezones(db: Session):
+    db.query(CountryTimezone).delete(synchronize_session=False)
+    total = 0
+    for country in db.query(Country).all():
+        entries = timezone_entries(country.timezones)
+        country.timezone_entries = entries
+        total += len(entries)
+    db.commit()
+    return total
+
+def main():
+    Base.metadata.create_all(bind=engine, tables=[CountryTimezone.__table__])
+
+    db = SessionLocal()
+    try:
+        total = backfill_timezones(db)
+        print(f"Backfilled {total} country timezones")
+    except Exception as e:
+        print(f"Error occurred: {e}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
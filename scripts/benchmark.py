@@ -0,0 +1,319 @@
+# scripts/benchmark.py
+"""
+Reproducible benchmark for the API, web and ingestion hot paths.
+
+Seeds a throwaway SQLite database with synthetic countries, times ingestion
+(with tracemalloc's peak), then drives the real app in-process over ASGI and
+reports p50/p99 latency and throughput per scenario as JSON:
+
+    python scripts/benchmark.py --rows 10000 --output bench.json
+    python scripts/benchmark.py --rows 10000 --compare bench.json
+
+``--compare`` exits non-zero when a scenario's p50 regressed by more than
+``--tolerance``. Settings such as ASYNC_DATABASE or FAST_JSON_RESPONSES are
+read from the environment as usual and recorded in the report.
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import platform
+import argparse
+import resource
+import shutil
+import tempfile
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+REGIONS = {
+    'Africa': ('Northern Africa', 'Western Africa', 'Eastern Africa', 'Southern Africa'),
+    'Americas': ('North America', 'South America', 'Caribbean', 'Central America'),
+    'Asia': ('Eastern Asia', 'Southern Asia', 'Western Asia', 'Central Asia'),
+    'Europe': ('Northern Europe', 'Southern Europe', 'Western Europe', 'Eastern Europe'),
+    'Oceania': ('Polynesia', 'Melanesia', 'Micronesia', 'Australia and New Zealand'),
+}
+LANGUAGES = {
+    'eng': 'English', 'fra': 'French', 'spa': 'Spanish', 'ara': 'Arabic', 'por': 'Portuguese',
+    'deu': 'German', 'rus': 'Russian', 'zho': 'Chinese', 'hin': 'Hindi', 'swa': 'Swahili',
+    'ita': 'Italian', 'nld': 'Dutch', 'tur': 'Turkish', 'jpn': 'Japanese', 'kor': 'Korean',
+}
+SYLLABLES = ('ka', 'lo', 'ri', 'na', 'mo', 'tu', 'sa', 've', 'di', 'ra', 'zen', 'bor', 'lia', 'sta', 'nia')
+TIMEZONES = tuple(f"UTC{offset:+03d}:00" for offset in range(-12, 15))
+
+# Codes are two letters for the first 676 rows (what store_countries accepts)
+TWO_LETTER_CODES = 26 * 26
+
+
+def code(index, width):
+    """Base-26 letters, at least ``width`` long; longer only past 26**width."""
+    letters = ''
+    while index or len(letters) < width:
+        index, digit = divmod(index, 26)
+        letters = chr(ord('A') + digit) + letters
+    return letters
+
+
+def synthetic_country(index, rng):
+    """A restcountries-shaped record; names and codes are unique per index."""
+    region = rng.choice(list(REGIONS))
+    name = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+    languages = dict(rng.sample(sorted(LANGUAGES.items()), rng.randint(1, 3)))
+    return {
+        'name': {'common': f"{name} {index}", 'official': f"Republic of {name} {index}"},
+        'cca2': code(index, 2),
+        'cca3': code(index, 3),
+        'independent': rng.random() < 0.9,
+        'unMember': rng.random() < 0.8,
+        'region': region,
+        'subregion': rng.choice(REGIONS[region]),
+        'area': round(rng.uniform(1, 1e7), 1),
+        'population': rng.randint(1_000, 1_500_000_000),
+        'flags': {'png': f"https://flags.example/{index}.png"},
+        'capital': [f"{name} City"],
+        'timezones': rng.sample(TIMEZONES, rng.randint(1, 3)),
+        'languages': languages,
+    }
+
+
+def synthetic_countries(rows, seed):
+    rng = random.Random(seed)
+    for index in range(rows):
+        yield synthetic_country(index, rng)
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))]
+
+
+def summarize(latencies, wall_seconds, statuses):
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'max_ms': round(latencies[-1] * 1000, 3),
+        'throughput_rps': round(len(latencies) / wall_seconds, 1),
+        'statuses': dict(Counter(statuses)),
+    }
+
+
+def seed_database(rows, seed, batch_size):
+    """
+    Insert ``rows`` synthetic countries, timing the ingestion pipeline.
+
+    store_countries only accepts two-letter cca2 codes, so the first 676
+    records go through it unchanged; larger datasets write the rest through
+    the same ``write_batch`` upsert with longer synthetic codes.
+    """
+    from app.db.database import SessionLocal
+    from scripts.fetch_and_store import init_db, store_countries, normalize_country, batched, write_batch
+
+    init_db()
+    db = SessionLocal()
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        records = synthetic_countries(rows, seed)
+        head = [next(records) for _ in range(min(rows, TWO_LETTER_CODES))]
+        stats = store_countries(db, head, batch_size=batch_size)
+        for batch in batched(map(normalize_country, records), batch_size):
+            write_batch(db, batch, stats)
+            db.commit()
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        db.close()
+
+    # Second pass over the same records: the unchanged-content fast path
+    db = SessionLocal()
+    start = time.perf_counter()
+    try:
+        resync = store_countries(db, synthetic_countries(min(rows, TWO_LETTER_CODES), seed), batch_size=batch_size)
+    finally:
+        db.close()
+    resync_elapsed = time.perf_counter() - start
+
+    return {
+        'rows': rows,
+        'seconds': round(elapsed, 3),
+        'rows_per_second': round(rows / elapsed, 1),
+        'tracemalloc_peak_bytes': peak,
+        'stats': dict(stats),
+        'resync_unchanged': {
+            'rows': min(rows, TWO_LETTER_CODES),
+            'seconds': round(resync_elapsed, 3),
+            'stats': dict(resync),
+        },
+    }
+
+
+def scenarios(rows, rng):
+    """name -> callable returning the next URL to request."""
+    def any_code():
+        return code(rng.randrange(rows), 2)
+
+    return {
+        'api_list': lambda: f"/countries_api/?limit=100&skip={rng.randrange(max(rows - 100, 1))}",
+        'api_detail': lambda: f"/countries_api/{any_code()}",
+        'api_region': lambda: f"/countries_api/{any_code()}/region",
+        'api_language': lambda: f"/countries_api/language/{rng.choice(list(LANGUAGES.values()))}",
+        'api_search': lambda: f"/countries_api/search/?name={rng.choice(SYLLABLES)}{rng.choice(SYLLABLES)}",
+        'html_index': lambda: f"/?region={rng.choice(list(REGIONS))}",
+    }
+
+
+async def run_scenario(client, next_url, requests, concurrency, warmup):
+    cold_start = time.perf_counter()
+    await client.get(next_url())
+    cold = time.perf_counter() - cold_start
+    for _ in range(warmup):
+        await client.get(next_url())
+
+    latencies, statuses = [], []
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            url = next_url()
+            start = time.perf_counter()
+            response = await client.get(url)
+            latencies.append(time.perf_counter() - start)
+            statuses.append(response.status_code)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result = summarize(latencies, time.perf_counter() - start, statuses)
+    result['cold_ms'] = round(cold * 1000, 3)
+    return result
+
+
+async def run_http(rows, seed, requests, concurrency, warmup, only):
+    import httpx
+    from app.main import app
+    from app.db.database import SessionLocal
+    from app.crud.users import create_user
+    from app.schemas.user import UserCreate
+
+    db = SessionLocal()
+    try:
+        create_user(db, UserCreate(username='bench', email='bench@example.com', password='bench'))
+    finally:
+        db.close()
+
+    rng = random.Random(seed)
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+        login = await client.post('/login', data={'username': 'bench', 'password': 'bench'})
+        if login.status_code != 303:
+            raise RuntimeError(f"Benchmark login failed with status {login.status_code}")
+        for name, next_url in scenarios(rows, rng).items():
+            if only and name not in only:
+                continue
+            results[name] = await run_scenario(client, next_url, requests, concurrency, warmup)
+            print(f"{name}: {results[name]['p50_ms']} ms p50, {results[name]['throughput_rps']} req/s", file=sys.stderr)
+    return results
+
+
+def compare(report, baseline, tolerance):
+    regressions = []
+    for name, result in report['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(name)
+        if not before:
+            continue
+        ratio = result['p50_ms'] / before['p50_ms'] if before['p50_ms'] else 1.0
+        result['p50_vs_baseline'] = round(ratio, 3)
+        if ratio > 1 + tolerance:
+            regressions.append(f"{name}: p50 {before['p50_ms']} -> {result['p50_ms']} ms")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark API, web and ingestion hot paths.")
+    parser.add_argument('--rows', type=int, default=250, help="synthetic countries to seed (250 to 1000000)")
+    parser.add_argument('--requests', type=int, default=500, help="measured requests per scenario")
+    parser.add_argument('--concurrency', type=int, default=8, help="concurrent in-flight requests")
+    parser.add_argument('--warmup', type=int, default=20, help="unmeasured requests per scenario")
+    parser.add_argument('--batch-size', type=int, default=500, help="ingestion batch size")
+    parser.add_argument('--seed', type=int, default=1, help="random seed for data and request mix")
+    parser.add_argument('--scenario', action='append', help="only run the named scenario (repeatable)")
+    parser.add_argument('--database', help="SQLite file to seed (default: a temporary file)")
+    parser.add_argument('--output', help="write the JSON report here instead of stdout")
+    parser.add_argument('--compare', help="baseline JSON report to compare p50s against")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed p50 slowdown vs baseline")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not 1 <= args.rows <= 1_000_000:
+        raise SystemExit("--rows must be between 1 and 1000000")
+
+    workdir = tempfile.mkdtemp(prefix='country-bench-')
+    database = os.path.abspath(args.database or os.path.join(workdir, 'bench.db'))
+    if os.path.exists(database):
+        raise SystemExit(f"{database} already exists; the benchmark needs a fresh database")
+    # Must be set before anything under app/ reads the settings
+    os.environ['DATABASE_URL'] = f"sqlite:///{database}"
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+    os.environ.setdefault('SESSION_BACKEND', 'memory')
+    # Templates and static paths are relative to the project root
+    os.chdir(project_root)
+
+    from app.core.config import settings
+
+    try:
+        ingestion = seed_database(args.rows, args.seed, args.batch_size)
+        print(f"ingestion: {ingestion['rows']} rows in {ingestion['seconds']} s", file=sys.stderr)
+        results = asyncio.run(run_http(args.rows, args.seed, args.requests, args.concurrency, args.warmup, args.scenario))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'rows': args.rows,
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'seed': args.seed,
+            'settings': {
+                key: getattr(settings, key)
+                for key in ('ASYNC_DATABASE', 'FAST_JSON_RESPONSES', 'SQLITE_PERFORMANCE_PROFILE', 'DB_POOL_SIZE')
+            },
+        },
+        'ingestion': ingestion,
+        'scenarios': results,
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        'max_rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+    regressions = []
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        report['regressions'] = regressions
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    for line in regressions:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+# scripts/create_change_log.py
+"""
+One-off migration: create the country_changes table. When the log is empty,
+it is seeded with one create per existing country, so a mirror syncing from
+version 0 receives the whole dataset. Safe to run more than once.
+"""
+import sys
+from pathlib import Path
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from app.db.database import SessionLocal, Base, engine
+from app.db.models.country import Country
+from app.db.models.country_change import CountryChange
+from app.crud.countries import change_entry
+from app.services.country_snapshot import CountryRecord
+
+def seed_change_log(db: Session):
+    if db.scalar(select(CountryChange.id).limit(1)) is not None:
+        return 0
+    countries = db.query(Country).order_by(Country.id).all()
+    db.add_all([change_entry(None, CountryRecord.from_model(country)) for country in countries])
+    db.commit()
+    return len(countries)
+
+def main():
+    Base.metadata.create_all(bind=engine, tables=[CountryChange.__table__])
+
+    db = SessionLocal()
+    try:
+        total = seed_change_log(db)
+        print(f"Seeded the change log with {total} countries")
+    except Exception as e:
+        print(f"Error occurred: {e}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,14 @@
 # scripts/fetch_and_store.py
 import sys
+import json
+import codecs
+import hashlib
+import argparse
 import requests
+from collections import Counter
 from pathlib import Path
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy import select, delete, insert
 
 # Add the project root to the Python path
 project_root = Path(__file__).parent.parent
@@ -11,37 +16,245 @@ sys.path.append(str(project_root))
 
 from app.db.database import SessionLocal, Base, engine
 from app.db.models.country import Country
+from app.db.models.country_change import CountryChange
+from app.db.models.country_language import CountryLanguage
+from app.db.models.country_timezone import CountryTimezone
 from app.db.models.user import User
 from app.schemas.user import UserCreate
 from app.crud.users import create_user
+from app.services.country_timezones import parse_utc_offset
+
+RESTCOUNTRIES_URL = 'https://restcountries.com/v3.1/all'
+DEFAULT_BATCH_SIZE = 500
+CHUNK_SIZE = 64 * 1024
+
+# Columns written by the upsert (and hashed to detect changes); cca2 is the conflict key
+UPSERT_COLUMNS = (
+    'name_common', 'name_official', 'cca3', 'independent', 'un_member', 'region',
+    'subregion', 'area', 'population', 'flag_url', 'capital', 'timezones', 'languages',
+)
 
 def init_db():
     Base.metadata.create_all(bind=engine)
 
-def fetch_countries():
-    response = requests.get('https://restcountries.com/v3.1/all')
-    return response.json()
+def iter_json_array(chunks):
+    """
+    Incrementally parse a top-level JSON array from an iterable of text
+    chunks, yielding one element at a time. Only the unparsed tail of the
+    input is buffered, so memory stays flat regardless of input size.
+    """
+    decoder = json.JSONDecoder()
+    chunks = iter(chunks)
+    buffer, pos = '', 0
+    started = exhausted = False
+    # Buffer length to reach before retrying a failed decode, so a very large
+    # element isn't re-parsed from scratch for every incoming chunk
+    retry_at = 0
+    while True:
+        while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+            pos += 1
+        if pos < len(buffer):
+            if not started:
+                if buffer[pos] != '[':
+                    raise ValueError("Expected a JSON array of countries")
+                started = True
+                pos += 1
+                continue
+            if buffer[pos] == ']':
+                return
+            if exhausted or len(buffer) >= retry_at:
+                try:
+                    item, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if exhausted:
+                        raise
+                    retry_at = 2 * len(buffer) - pos
+                else:
+                    # Something must follow an element; otherwise it may be truncated
+                    if end < len(buffer) or exhausted:
+                        yield item
+                        pos, retry_at = end, 0
+                        continue
+                    retry_at = len(buffer) + 1
+        if exhausted:
+            raise ValueError("Unexpected end of JSON input")
+        chunk = next(chunks, None)
+        if chunk is None:
+            exhausted = True
+            continue
+        buffer, retry_at = buffer[pos:] + chunk, max(0, retry_at - pos)
+        pos = 0
+
+def decode_chunks(byte_chunks):
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    for chunk in byte_chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+def stream_file(path, chunk_size=CHUNK_SIZE):
+    with open(path, 'rb') as f:
+        yield from iter_json_array(decode_chunks(iter(lambda: f.read(chunk_size), b'')))
+
+def stream_url(url=RESTCOUNTRIES_URL, chunk_size=CHUNK_SIZE):
+    with requests.get(url, stream=True, timeout=60) as response:
+        response.raise_for_status()
+        yield from iter_json_array(decode_chunks(response.iter_content(chunk_size=chunk_size)))
+
+def iter_countries(source=None):
+    """Stream raw restcountries records from a local JSON file or an HTTP URL."""
+    if source and not source.startswith(('http://', 'https://')):
+        return stream_file(source)
+    return stream_url(source or RESTCOUNTRIES_URL)
 
-def store_countries(db: Session, countries_data):
+def normalize_country(country_data):
+    """Map a restcountries record onto Country columns."""
+    return {
+        'cca2': country_data.get('cca2'),
+        'name_common': country_data.get('name', {}).get('common', ''),
+        'name_official': country_data.get('name', {}).get('official', ''),
+        'cca3': country_data.get('cca3') or None,
+        'independent': country_data.get('independent', None),
+        'un_member': country_data.get('unMember', False),
+        'region': country_data.get('region', ''),
+        'subregion': country_data.get('subregion', None),
+        'area': country_data.get('area', None),
+        'population': country_data.get('population', 0),
+        'flag_url': country_data.get('flags', {}).get('png', ''),
+        'capital': (country_data.get('capital') or [None])[0],
+        'timezones': country_data.get('timezones', []),
+        'languages': country_data.get('languages', {}),
+    }
+
+def is_valid_country(row):
+    return (
+        isinstance(row['cca2'], str) and len(row['cca2']) == 2
+        and bool(row['name_common'])
+        and isinstance(row['languages'] or {}, dict)
+        and isinstance(row['timezones'] or [], list)
+    )
+
+def valid_countries(countries_data, stats):
     for country_data in countries_data:
-        country = Country(
-            name_common=country_data.get('name', {}).get('common', ''),
-            name_official=country_data.get('name', {}).get('official', ''),
-            cca2=country_data.get('cca2', ''),
-            cca3=country_data.get('cca3', ''),
-            independent=country_data.get('independent', None),
-            un_member=country_data.get('unMember', False),
-            region=country_data.get('region', ''),
-            subregion=country_data.get('subregion', None),
-            area=country_data.get('area', None),
-            population=country_data.get('population', 0),
-            flag_url=country_data.get('flags', {}).get('png', ''),
-            capital=country_data.get('capital', [None])[0],
-            timezones=country_data.get('timezones', []),
-            languages=country_data.get('languages', {})
-        )
-        db.add(country)
-    db.commit()
+        row = normalize_country(country_data)
+        if not is_valid_country(row):
+            stats['skipped'] += 1
+            continue
+        yield row
+
+def batched(rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def content_hash(row):
+    payload = {column: row.get(column) for column in UPSERT_COLUMNS}
+    if payload['area'] is not None:
+        payload['area'] = float(payload['area'])
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+def upsert_statement(db: Session, rows):
+    dialect = db.get_bind().dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        raise ValueError(f"Bulk upsert is not supported for the '{dialect}' dialect")
+    stmt = dialect_insert(Country.__table__).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[Country.cca2],
+        set_={column: stmt.excluded[column] for column in UPSERT_COLUMNS},
+    )
+
+def write_batch(db: Session, rows, stats):
+    # Last record wins if the same cca2 appears twice in one batch
+    rows = {row['cca2']: row for row in rows}
+    columns = [getattr(Country, column) for column in ('cca2',) + UPSERT_COLUMNS]
+    existing = {
+        row.cca2: row._asdict()
+        for row in db.execute(select(*columns).where(Country.cca2.in_(rows)))
+    }
+    # cca3 is unique too, but not the conflict key: a row whose cca3 belongs to
+    # another country (stored, or earlier in this batch) would fail the batch
+    cca3s = {row['cca3'] for row in rows.values() if row['cca3']}
+    cca3_owners = dict(db.execute(select(Country.cca3, Country.cca2).where(Country.cca3.in_(cca3s))).all())
+
+    changed = []
+    for cca2, row in rows.items():
+        if row['cca3']:
+            if cca3_owners.setdefault(row['cca3'], cca2) != cca2:
+                stats['skipped'] += 1
+                continue
+        if cca2 not in existing:
+            stats['inserted'] += 1
+        elif content_hash(existing[cca2]) != content_hash(row):
+            stats['updated'] += 1
+        else:
+            stats['unchanged'] += 1
+            continue
+        changed.append(row)
+    if not changed:
+        return
+
+    db.execute(upsert_statement(db, changed))
+
+    # Rebuild the language and timezone index rows of every country that was written
+    ids = dict(db.execute(select(Country.cca2, Country.id).where(Country.cca2.in_([r['cca2'] for r in changed]))).all())
+    db.execute(delete(CountryLanguage).where(CountryLanguage.country_id.in_(ids.values())))
+    db.execute(delete(CountryTimezone).where(CountryTimezone.country_id.in_(ids.values())))
+    languages = [
+        {'country_id': ids[row['cca2']], 'code': code.lower(), 'name': name}
+        for row in changed
+        for code, name in (row['languages'] or {}).items()
+    ]
+    if languages:
+        db.execute(insert(CountryLanguage), languages)
+    timezones = [
+        {'country_id': ids[row['cca2']], 'name': name, 'offset_minutes': parse_utc_offset(name)}
+        for row in changed
+        for name in dict.fromkeys(row['timezones'] or ())
+    ]
+    if timezones:
+        db.execute(insert(CountryTimezone), timezones)
+
+    # Log the writes for the change feed, in the batch's transaction
+    db.execute(insert(CountryChange), [
+        {
+            'country_id': ids[row['cca2']],
+            'cca2': row['cca2'],
+            'operation': 'update' if row['cca2'] in existing else 'create',
+            'changed_fields': [
+                column for column in UPSERT_COLUMNS if existing[row['cca2']][column] != row[column]
+            ] if row['cca2'] in existing else None,
+            'data': {'id': ids[row['cca2']], **row},
+        }
+        for row in changed
+    ])
+
+def store_countries(db: Session, countries_data, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Idempotently upsert restcountries records in batches, keyed on cca2.
+    ``countries_data`` may be any iterable (e.g. ``iter_countries``); records
+    flow through normalize -> validate -> batch write one at a time and each
+    batch is committed before the next is read. Rows whose content is
+    unchanged are not written; rows whose cca3 belongs to another country are
+skipped. Returns a Counter with inserted / updated /
+    unchanged / skipped totals.
+    """
+    stats = Counter(inserted=0, updated=0, unchanged=0, skipped=0)
+    for batch in batched(valid_countries(countries_data, stats), batch_size):
+        write_batch(db, batch, stats)
+        db.commit()
+    return stats
 
 def create_demo_user_if_needed(db: Session):
     # Check if users table is empty
@@ -61,23 +274,39 @@ def create_demo_user_if_needed(db: Session):
     else:
         print("Users already exist in database. Skipping demo user creation.")
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch country data and upsert it into the database.")
+    parser.add_argument('source', nargs='?', default=None,
+                        help=f"local JSON file or URL to read countries from (default: {RESTCOUNTRIES_URL})")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help="number of countries written per upsert statement")
+    parser.add_argument('--no-demo-user', action='store_true',
+                        help="skip the interactive demo user prompt (for scheduled re-syncs)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
     # Initialize database first
     init_db()
     
     db = SessionLocal()
     try:
         # Create demo user if needed
-        create_demo_user_if_needed(db)
+        if not args.no_demo_user:
+            create_demo_user_if_needed(db)
         
         # Fetch and store countries
-        countries_data = fetch_countries()
-        store_countries(db, countries_data)
-        print(f"Successfully stored {len(countries_data)} countries")
+        stats = store_countries(db, iter_countries(args.source), batch_size=args.batch_size)
+        print(
+            f"Countries stored: {stats['inserted']} inserted, {stats['updated']} updated, "
+            f"{stats['unchanged']} unchanged, {stats['skipped']} skipped"
+        )
     except Exception as e:
-        print(f"Error occurred: {e}")
+        print(f"Error occurred: {e}", file=sys.stderr)
+        raise SystemExit(1)
     finally:
         db.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,90 @@
+# scripts/measure_imports.py
+"""
+Measure how long a fresh process takes to import the app, module by module.
+
+Runs ``python -X importtime -c "import app.main"`` in a subprocess (so
+nothing is cached in this interpreter) and reports the total and the slowest
+modules by self and cumulative time, plus the time per top-level package.
+Use it before and after moving an import behind first use.
+
+    python scripts/measure_imports.py
+    python scripts/measure_imports.py --top 30 --json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+
+
+def measure(module: str):
+    """[(module, self_us, cumulative_us)] in import order."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=project_root,
+        env={**os.environ, "PYTHONPATH": str(project_root)},
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise SystemExit(result.stderr)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def ms(us: int) -> float:
+    return round(us / 1000, 1)
+
+
+def report(rows, top: int) -> dict:
+    by_package = defaultdict(int)
+    for name, self_us, _ in rows:
+        by_package[name.split(".")[0]] += self_us
+    return {
+        "total_ms": ms(sum(self_us for _, self_us, _ in rows)),
+        "modules": len(rows),
+        "slowest_self_ms": [
+            (name, ms(self_us)) for name, self_us, _ in sorted(rows, key=lambda r: -r[1])[:top]
+        ],
+        "slowest_cumulative_ms": [
+            (name, ms(cumulative_us)) for name, _, cumulative_us in sorted(rows, key=lambda r: -r[2])[:top]
+        ],
+        "packages_ms": [
+            (package, ms(us)) for package, us in sorted(by_package.items(), key=lambda item: -item[1])[:top]
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure app import time per module")
+    parser.add_argument("--module", default="app.main", help="Module to import (default: app.main)")
+    parser.add_argument("--top", type=int, default=15, help="Rows per table")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    result = report(measure(args.module), args.top)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(f"import {args.module}: {result['total_ms']} ms across {result['modules']} modules")
+    for title, key in (
+        ("Slowest modules (self)", "slowest_self_ms"),
+        ("Slowest modules (cumulative)", "slowest_cumulative_ms"),
+        ("Time per top-level package", "packages_ms"),
+    ):
+        print(f"\n{title}:")
+        for name, value in result[key]:
+            print(f"  {value:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "test")
+
+from sqlalchemy import text
+
+from app.crud.countries import (
+    bulk_create_countries, bulk_update_countries, create_country, get_changes, get_country_by_cca2,
+)
+from app.schemas.country import CountryBulkUpdate, CountryCreate
+
+
+def country(cca2, cca3=None, **values):
+    return CountryCreate(name_common=cca2, name_official=cca2, cca2=cca2, cca3=cca3, population=1, **values)
+
+
+def statuses(results):
+    return [(result["cca2"], result["status"]) for result in results]
+
+
+def test_bulk_create_skips_taken_codes_up_front(db):
+    create_country(db, country("FR", "FRA"))
+    results = bulk_create_countries(db, [
+        country("FR", "FRX"),  # cca2 taken
+        country("FX", "FRA"),  # cca3 taken
+        country("ES", "ESP"),
+        country("ES", "ESX"),  # repeated within the request
+        country("EX", "ESP"),
+        country("PT"),  # no cca3
+    ])
+    assert statuses(results) == [
+        ("FR", "error"), ("FX", "error"), ("ES", "created"), ("ES", "error"), ("EX", "error"), ("PT", "created"),
+    ]
+    assert [(c.operation, c.cca2) for c in get_changes(db)] == [("create", "FR"), ("create", "ES"), ("create", "PT")]
+
+
+def test_bulk_create_rolls_back_everything_when_the_flush_fails(db):
+    # Stands in for a row another writer inserted after the pre-check
+    db.execute(text(
+        "CREATE TRIGGER reject_qq BEFORE INSERT ON countries WHEN NEW.cca2 = 'QQ' "
+        "BEGIN SELECT RAISE(ABORT, 'taken'); END"
+    ))
+    results = bulk_create_countries(db, [country("DE"), country("QQ"), country("FR"), country("DE")])
+    assert statuses(results) == [("DE", "error"), ("QQ", "error"), ("FR", "error"), ("DE", "error")]
+    assert results[0]["detail"] == "Transaction rolled back: integrity error"
+    assert results[3]["detail"] == "Country already exists"  # pre-check errors keep their own detail
+    assert get_country_by_cca2(db, "DE") is None
+    assert get_changes(db) == []
+
+
+def test_bulk_update_rolls_back_everything_when_the_commit_fails(db):
+    create_country(db, country("FR"))
+    create_country(db, country("DE"))
+    db.execute(text(
+        "CREATE TRIGGER reject_negative BEFORE UPDATE ON countries WHEN NEW.population < 0 "
+        "BEGIN SELECT RAISE(ABORT, 'negative population'); END"
+    ))
+    db.commit()
+    results = bulk_update_countries(db, [
+        CountryBulkUpdate(cca2="FR", population=5),
+        CountryBulkUpdate(cca2="DE", population=-1),
+        CountryBulkUpdate(cca2="XX", population=5),
+    ])
+    assert statuses(results) == [("FR", "error"), ("DE", "error"), ("XX", "error")]
+    assert results[2]["detail"] == "Country not found"
+    assert get_country_by_cca2(db, "FR").population == 1
+    assert len(get_changes(db)) == 2  # only the two creates
@@ -0,0 +1,111 @@
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "test")
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.core import compression
+from app.core.compression import CompressionMiddleware, negotiate
+from app.services import country_events
+
+
+@pytest.fixture
+def all_encoders(monkeypatch):
+    for name in ("br", "zstd"):
+        monkeypatch.setitem(compression.ENCODERS, name, compression.ENCODERS["gzip"])
+
+
+@pytest.mark.parametrize("header, encoding", [
+    (None, None),
+    ("", None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("GZIP", "gzip"),
+    ("gzip, br", "br"),  # equal weights: server preference
+    ("gzip, zstd", "zstd"),
+    ("br;q=0.5, gzip", "gzip"),
+    ("br;q=0, gzip;q=0", None),
+    ("*", "br"),
+    ("*, br;q=0", "zstd"),
+    ("gzip;q=0.2, *;q=0.5", "br"),
+    ("gzip;q=bogus", None),
+])
+def test_negotiate(all_encoders, header, encoding):
+    assert negotiate(header) == encoding
+
+
+def test_negotiate_only_offers_installed_encoders(monkeypatch):
+    monkeypatch.delitem(compression.ENCODERS, "br", raising=False)
+    monkeypatch.delitem(compression.ENCODERS, "zstd", raising=False)
+    assert negotiate("br, zstd") is None
+    assert negotiate("br, gzip;q=0.1") == "gzip"
+
+
+BODY = {"rows": ["x" * 40] * 50}
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    calls = []
+
+    @app.get("/api/data")
+    def data(request: Request):
+        calls.append(request.url.query)
+        return BODY
+
+    @app.get("/api/live")
+    def live():
+        calls.append("live")
+        return BODY
+
+    app.add_middleware(
+        CompressionMiddleware, minimum_size=100, cache_prefix="/api", uncached_paths=["/api/live"],
+    )
+    client = TestClient(app, headers={"Accept-Encoding": "gzip"})
+    client.calls = calls
+    return client
+
+
+def fetch(client, path, **headers):
+    response = client.get(path, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json() == BODY
+    return response
+
+
+def test_repeat_request_is_served_from_cache(client):
+    first = fetch(client, "/api/data")
+    second = fetch(client, "/api/data")
+    assert client.calls == [""]
+    assert second.headers["etag"] == first.headers["etag"]
+    assert first.headers["etag"].endswith('-gzip"')
+
+
+def test_cache_key_includes_query_accept_last_event_id_and_version(client):
+    fetch(client, "/api/data")
+    fetch(client, "/api/data?page=2")
+    fetch(client, "/api/data", Accept="text/event-stream")
+    fetch(client, "/api/data", **{"Last-Event-ID": "7"})
+    assert len(client.calls) == 4
+    country_events.bump()
+    fetch(client, "/api/data")
+    assert len(client.calls) == 5
+
+
+def test_uncached_paths_always_reach_the_route(client):
+    fetch(client, "/api/live")
+    fetch(client, "/api/live")
+    assert client.calls == ["live", "live"]
+
+
+def test_identity_requests_are_neither_compressed_nor_cached(client):
+    response = client.get("/api/data", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.json() == BODY
+    fetch(client, "/api/data")
+    assert len(client.calls) == 2
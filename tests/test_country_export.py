@@ -0,0 +1,85 @@
+import gzip
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "test")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import country_events
+from app.services.country_export import FORMATS, ExportArtifact, export_cache, parse_range
+
+SIZE = 100
+
+
+@pytest.mark.parametrize("header, span", [
+    (None, None),
+    ("", None),
+    ("items=0-9", None),
+    ("bytes=0-9,20-29", None),  # multiple ranges: send everything
+    ("bytes=x-9", None),
+    ("bytes=0-9", (0, 9)),
+    ("bytes=90-", (90, 99)),
+    ("bytes=90-500", (90, 99)),
+    ("bytes=-10", (90, 99)),
+    ("bytes=-500", (0, 99)),
+    ("bytes=99-99", (99, 99)),
+])
+def test_parse_range(header, span):
+    assert parse_range(header, SIZE) == span
+
+
+@pytest.mark.parametrize("header", ["bytes=100-", "bytes=150-200", "bytes=10-5", "bytes=-0"])
+def test_parse_range_unsatisfiable(header):
+    with pytest.raises(ValueError):
+        parse_range(header, SIZE)
+
+
+BODY = b"".join(b'{"id":%d}\n' % i for i in range(40))
+
+
+@pytest.fixture
+def client():
+    # A cached artifact for the current version, so nothing is read from the database
+    export_cache.put(ExportArtifact(FORMATS["jsonl"], country_events.current_version(), BODY))
+    return TestClient(app)
+
+
+def test_range_request_gets_206(client):
+    response = client.get("/countries_api/export", headers={"Accept-Encoding": "identity", "Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.content == BODY[10:20]
+    assert response.headers["content-range"] == f"bytes 10-19/{len(BODY)}"
+    assert response.headers["accept-ranges"] == "bytes"
+
+
+def test_unsatisfiable_range_gets_416(client):
+    response = client.get(
+        "/countries_api/export", headers={"Accept-Encoding": "identity", "Range": f"bytes={len(BODY)}-"}
+    )
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(BODY)}"
+
+
+def test_stale_if_range_gets_the_full_body(client):
+    response = client.get(
+        "/countries_api/export",
+        headers={"Accept-Encoding": "identity", "Range": "bytes=10-19", "If-Range": '"old"'},
+    )
+    assert response.status_code == 200
+    assert response.content == BODY
+
+
+def test_ranges_apply_to_the_encoded_representation(client):
+    full = client.get("/countries_api/export", headers={"Accept-Encoding": "gzip"})
+    etag = full.headers["etag"]
+    assert etag.endswith('-jsonl-gzip"')
+    response = client.get(
+        "/countries_api/export",
+        headers={"Accept-Encoding": "gzip", "Range": "bytes=0-9", "If-Range": etag},
+    )
+    assert response.status_code == 206
+    encoded = gzip.compress(BODY, compresslevel=6, mtime=0)
+    assert response.headers["content-range"] == f"bytes 0-9/{len(encoded)}"
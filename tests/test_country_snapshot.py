@@ -0,0 +1,75 @@
+import base64
+import json
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "test")
+
+import pytest
+
+from app.services.country_snapshot import CountryRecord, CountrySnapshot, decode_cursor, encode_cursor
+
+
+def record(id, population=None, area=None, name=None):
+    return CountryRecord(
+        id=id, name_common=name or f"C{id}", name_official=None, cca2=f"{id:02d}", cca3=None,
+        independent=None, un_member=None, region=None, subregion=None, area=area,
+        population=population, flag_url=None, capital=None, timezones=None, languages=None,
+    )
+
+
+def raw_cursor(*values) -> str:
+    raw = json.dumps(list(values)).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def page_through(snapshot, column, descending, limit=2):
+    pages, after = [], None
+    while True:
+        page, next_key = snapshot.keyset_page(column, descending, after=after, limit=limit)
+        pages.extend(r.id for r in page)
+        if next_key is None:
+            return pages
+        after = decode_cursor(encode_cursor(column, next_key), column)
+
+
+def test_cursor_round_trip():
+    key = (False, 12.5, 7)
+    assert decode_cursor(encode_cursor("area", key), "area") == key
+    assert decode_cursor(encode_cursor("area", (True, "", 3)), "area") == (True, "", 3)
+
+
+@pytest.mark.parametrize("cursor, column", [
+    (raw_cursor("population", False, "1000", 1), "population"),  # string for an int column
+    (raw_cursor("population", False, 1.5, 1), "population"),
+    (raw_cursor("name_common", False, 3, 1), "name_common"),
+    (raw_cursor("population", False, True, 1), "population"),  # bool is not an int here
+    (raw_cursor("population", "no", 1, 1), "population"),
+    (raw_cursor("population", True, 0, 1), "population"),  # NULL keys carry ""
+    (raw_cursor("population", False, 1, "1"), "population"),
+    (raw_cursor("population", False, 1), "population"),
+    ("not base64 json", "population"),
+])
+def test_decode_cursor_rejects_mismatched_types(cursor, column):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, column)
+
+
+def test_decode_cursor_rejects_other_sort():
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor("area", (False, 1.0, 1)), "population")
+
+
+def test_keyset_pages_sort_nulls_last_and_ties_by_id():
+    snapshot = CountrySnapshot([
+        record(1, population=30), record(2), record(3, population=10),
+        record(4, population=30), record(5), record(6, population=20),
+    ])
+    ascending = [3, 6, 1, 4, 2, 5]
+    assert page_through(snapshot, "population", descending=False) == ascending
+    assert page_through(snapshot, "population", descending=True) == ascending[::-1]
+
+
+def test_keyset_page_mixed_int_and_float_area():
+    snapshot = CountrySnapshot([record(1, area=2), record(2, area=1.5), record(3), record(4, area=2.0)])
+    assert page_through(snapshot, "area", descending=False, limit=1) == [2, 1, 4, 3]
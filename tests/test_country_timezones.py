@@ -0,0 +1,42 @@
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "test")
+
+import pytest
+
+from app.services.country_timezones import MAX_OFFSET, MIN_OFFSET, format_utc_offset, parse_utc_offset
+
+
+@pytest.mark.parametrize("value, minutes", [
+    ("UTC", 0),
+    ("utc", 0),
+    ("GMT", 0),
+    ("UTC+05:30", 330),
+    ("UTC+0530", 330),
+    ("UTC+5", 300),
+    ("+05:30", 330),
+    ("+5:45", 345),
+    ("5", 300),
+    ("-0330", -210),
+    ("UTC-03:00", -180),
+    ("UTC−03:00", -180),  # restcountries sometimes uses the Unicode minus sign
+    ("GMT+1", 60),
+    (" UTC+01:00 ", 60),
+    ("UTC-12:00", MIN_OFFSET),
+    ("UTC+14:00", MAX_OFFSET),
+])
+def test_parse_utc_offset(value, minutes):
+    assert parse_utc_offset(value) == minutes
+
+
+@pytest.mark.parametrize("value", [
+    None, "", "Europe/Paris", "UTC+05:60", "UTC+1:5", "UTC+14:01", "UTC-12:30", "UTC+1500", "UTC++01:00",
+])
+def test_parse_utc_offset_rejects_other_values(value):
+    assert parse_utc_offset(value) is None
+
+
+@pytest.mark.parametrize("minutes", [MIN_OFFSET, -210, 0, 330, 345, MAX_OFFSET])
+def test_format_round_trips(minutes):
+    assert parse_utc_offset(format_utc_offset(minutes)) == minutes
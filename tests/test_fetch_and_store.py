@@ -0,0 +1,46 @@
+import json
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "test")
+
+import pytest
+
+from scripts.fetch_and_store import decode_chunks, iter_json_array
+
+DOCUMENT = json.dumps([
+    {"cca2": "FR", "name": {"common": "France"}, "population": 67391582},
+    {"cca2": "CI", "name": {"common": "Côte d'Ivoire"}, "timezones": ["UTC"]},
+    12,
+    "tail",
+    [],
+])
+
+
+def test_elements_split_across_every_chunk_boundary():
+    expected = json.loads(DOCUMENT)
+    for cut in range(len(DOCUMENT) + 1):
+        assert list(iter_json_array([DOCUMENT[:cut], DOCUMENT[cut:]])) == expected
+    assert list(iter_json_array(DOCUMENT)) == expected  # one character per chunk
+
+
+def test_number_split_across_chunks_is_not_cut_short():
+    assert list(iter_json_array(["[1, 2", "3, 4", "5]"])) == [1, 23, 45]
+
+
+def test_multibyte_characters_split_across_byte_chunks():
+    data = DOCUMENT.encode()
+    chunks = [data[i:i + 1] for i in range(len(data))]
+    assert list(iter_json_array(decode_chunks(chunks))) == json.loads(DOCUMENT)
+
+
+@pytest.mark.parametrize("cut", range(1, len(DOCUMENT)))
+def test_truncated_input_raises(cut):
+    with pytest.raises(ValueError):
+        list(iter_json_array([DOCUMENT[:cut]]))
+
+
+@pytest.mark.parametrize("text", ["", "   ", '{"cca2": "FR"}'])
+def test_non_array_input_raises(text):
+    with pytest.raises(ValueError):
+        list(iter_json_array([text]))
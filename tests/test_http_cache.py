@@ -0,0 +1,90 @@
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "test")
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.http_cache import CachePolicy, HTTPCacheMiddleware, current_etag, etag_matches
+from app.services import country_events
+
+ETAG = '"boot-7"'
+
+
+@pytest.mark.parametrize("header, matched", [
+    (None, None),
+    ("", None),
+    ('"boot-7"', '"boot-7"'),
+    ('W/"boot-7"', '"boot-7"'),
+    ('"boot-7-gzip"', '"boot-7-gzip"'),
+    ('"boot-7-br", "other"', '"boot-7-br"'),
+    ('"other", "boot-7-zstd"', '"boot-7-zstd"'),
+    ('"boot-7-deflate"', None),
+    ('"boot-70"', None),
+    ('"boot-6"', None),
+    ("*", ETAG),
+])
+def test_etag_matches_encoding_suffixes(header, matched):
+    assert etag_matches(header, ETAG) == matched
+
+
+def test_exact_etag_match_ignores_encoding_suffixes():
+    assert etag_matches('"boot-7-gzip"', ETAG, exact=True) is None
+    assert etag_matches('"boot-7"', ETAG, exact=True) == ETAG
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    calls = []
+
+    @app.get("/api/data")
+    def data():
+        calls.append("data")
+        return {"ok": True}
+
+    @app.get("/api/live")
+    def live():
+        calls.append("live")
+        return {"ok": True}
+
+    app.add_middleware(
+        HTTPCacheMiddleware,
+        prefix="/api",
+        default_policy=CachePolicy(max_age=60),
+        policies={"/live": CachePolicy(versioned=False)},
+    )
+    client = TestClient(app)
+    client.calls = calls
+    return client
+
+
+def test_current_etag_is_answered_with_304_before_the_route(client):
+    response = client.get("/api/data")
+    assert response.status_code == 200
+    assert response.headers["etag"] == current_etag()
+    assert response.headers["cache-control"] == "public, max-age=60"
+
+    for tag in (response.headers["etag"], f'{response.headers["etag"][:-1]}-gzip"'):
+        revalidated = client.get("/api/data", headers={"If-None-Match": tag})
+        assert revalidated.status_code == 304
+        assert revalidated.headers["etag"] == tag
+        assert revalidated.content == b""
+    assert client.calls == ["data"]
+
+
+def test_write_moves_the_etag(client):
+    etag = client.get("/api/data").headers["etag"]
+    country_events.bump()
+    response = client.get("/api/data", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_unversioned_route_is_never_revalidated(client):
+    response = client.get("/api/live", headers={"If-None-Match": current_etag()})
+    assert response.status_code == 200
+    assert "etag" not in response.headers
+    assert response.headers["cache-control"] == "no-cache"
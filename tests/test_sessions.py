@@ -0,0 +1,117 @@
+import os
+from types import SimpleNamespace
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "test")
+
+import pytest
+from fastapi import FastAPI, Request, Response
+from fastapi.testclient import TestClient
+
+from app.core import sessions
+from app.core.sessions import MemorySessionBackend, ServerSessionMiddleware, SqliteSessionBackend
+from app.routes.auth_routes import auth_router
+
+MAX_AGE = 100
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(sessions, "time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path, monkeypatch, clock):
+    if request.param == "memory":
+        backend = MemorySessionBackend()
+    else:
+        backend = SqliteSessionBackend(str(tmp_path / "sessions.db"))
+    # /logout?everywhere revokes through the module-level backend
+    monkeypatch.setattr(sessions, "session_backend", backend)
+    return backend
+
+
+@pytest.fixture
+def app(backend):
+    app = FastAPI()
+
+    @app.get("/as/{user}")
+    def log_in(user: str, request: Request):
+        request.session["user"] = user
+        return {}
+
+    @app.get("/me")
+    def me(request: Request):
+        return {"user": request.session.get("user")}
+
+    @app.get("/public")
+    def public(request: Request, response: Response):
+        response.headers["Cache-Control"] = "public, max-age=60"
+        return {"user": request.session.get("user")}
+
+    app.include_router(auth_router)
+    app.add_middleware(ServerSessionMiddleware, backend=backend, max_age=MAX_AGE)
+    return app
+
+
+def client_as(app, user):
+    client = TestClient(app, follow_redirects=False)
+    client.get(f"/as/{user}")
+    return client
+
+
+def user_of(client, path="/me"):
+    return client.get(path).json()["user"]
+
+
+def test_session_id_rotates_when_the_user_changes(app, backend):
+    client = client_as(app, "alice")
+    alice_id = client.cookies["session"]
+    client.get("/as/alice")
+    assert client.cookies["session"] == alice_id  # same user: same id
+    client.get("/as/bob")
+    assert client.cookies["session"] != alice_id
+    assert backend.get(alice_id) is None
+    assert user_of(client) == "bob"
+
+
+def test_sliding_expiry_extends_the_session_and_the_cookie(app, clock):
+    client = client_as(app, "alice")
+    session_id = client.cookies["session"]
+    clock[0] += 80
+    response = client.get("/me")
+    assert response.json()["user"] == "alice"
+    assert f"session={session_id}; path=/; Max-Age={MAX_AGE}" in response.headers["set-cookie"]
+    clock[0] += 80  # past the original expiry, within the extended one
+    assert user_of(client) == "alice"
+    clock[0] += MAX_AGE + 1
+    assert user_of(client) is None
+
+
+def test_publicly_cacheable_responses_extend_without_a_cookie(app, clock):
+    client = client_as(app, "alice")
+    clock[0] += 80
+    response = client.get("/public")
+    assert response.json()["user"] == "alice"
+    assert "set-cookie" not in response.headers
+    clock[0] += 80
+    assert user_of(client) == "alice"
+
+
+def test_logout_ends_only_this_session(app):
+    laptop, phone = client_as(app, "alice"), client_as(app, "alice")
+    response = laptop.get("/logout")
+    assert response.status_code == 307
+    assert "Max-Age=0" in response.headers["set-cookie"]
+    assert user_of(laptop) is None
+    assert user_of(phone) == "alice"
+
+
+def test_logout_everywhere_revokes_every_session_of_the_user(app):
+    laptop, phone, other = client_as(app, "alice"), client_as(app, "alice"), client_as(app, "bob")
+    laptop.get("/logout", params={"everywhere": "true"})
+    assert user_of(laptop) is None
+    assert user_of(phone) is None
+    assert user_of(other) == "bob"
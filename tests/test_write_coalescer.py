@@ -0,0 +1,75 @@
+import asyncio
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "test")
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app.crud import countries, write_coalescer
+from app.crud.write_coalescer import WriteCoalescer
+from app.schemas.country import CountryCreate, CountryUpdate
+
+
+def country(cca2):
+    return CountryCreate(name_common=cca2, name_official=cca2, cca2=cca2, cca3=cca2 + "X", population=1)
+
+
+@pytest.fixture
+def coalescer(session_factory, monkeypatch):
+    monkeypatch.setattr(write_coalescer, "SessionLocal", session_factory)
+    with session_factory() as db:
+        countries.create_country(db, country("FR"))
+    coalescer = WriteCoalescer(window_ms=5)
+    yield coalescer
+    coalescer.close()
+
+
+def logged(session_factory):
+    with session_factory() as db:
+        return [(change.operation, change.cca2) for change in countries.get_changes(db)]
+
+
+def test_batch_commits_every_write_together(coalescer, session_factory):
+    outcomes = coalescer.apply([
+        (countries.stage_create, (country("ES"),)),
+        (countries.stage_update, ("FR", CountryUpdate(population=5))),
+    ])
+    assert [succeeded for succeeded, _ in outcomes] == [True, True]
+    assert outcomes[0][1].cca2 == "ES"
+    assert outcomes[1][1].population == 5
+    assert logged(session_factory) == [("create", "FR"), ("create", "ES"), ("update", "FR")]
+
+
+def test_failed_batch_falls_back_to_one_transaction_per_write(coalescer, session_factory):
+    outcomes = coalescer.apply([
+        (countries.stage_create, (country("ES"),)),
+        (countries.stage_create, (country("FR"),)),  # already exists
+        (countries.stage_delete, ("FR",)),
+    ])
+    assert outcomes[0][0] is True
+    assert outcomes[1][0] is False and isinstance(outcomes[1][1], IntegrityError)
+    assert outcomes[2] == (True, True)
+    assert logged(session_factory) == [("create", "FR"), ("create", "ES"), ("delete", "FR")]
+
+
+def test_single_failing_write_raises(coalescer, session_factory):
+    with pytest.raises(IntegrityError):
+        coalescer.apply([(countries.stage_create, (country("FR"),))])
+    assert logged(session_factory) == [("create", "FR")]
+
+
+def test_each_caller_gets_its_own_outcome(coalescer, session_factory):
+    async def submit_all():
+        return await asyncio.gather(
+            coalescer.submit(countries.stage_create, country("ES")),
+            coalescer.submit(countries.stage_create, country("FR")),
+            coalescer.submit(countries.stage_create, country("PT")),
+            return_exceptions=True,
+        )
+
+    created, failed, other = asyncio.run(submit_all())
+    assert created.cca2 == "ES" and other.cca2 == "PT"
+    assert isinstance(failed, IntegrityError)
+    assert logged(session_factory) == [("create", "FR"), ("create", "ES"), ("create", "PT")]